@@ -0,0 +1,188 @@
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from farmmodel import FarmModel
+from sweep import DEFAULT_PARAMETERS
+
+
+PHASES = ('growth', 'targets', 'pathfinding', 'movement')
+
+
+def _timed(function, totals, phase):
+    def wrapper(*args, **kwargs):
+        start_time = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            totals[phase] += time.perf_counter() - start_time
+    return wrapper
+
+
+def run_one(params, seed, steps):
+    # Per-step latencies and per-phase totals for one seeded run
+    params = {**DEFAULT_PARAMETERS, **params, 'seed': seed, 'steps': steps}
+    totals = dict.fromkeys(PHASES, 0.0)
+    latencies = []
+    model = FarmModel(params)
+    model.initialize()
+    # Instance attributes shadow the methods step() calls, so the model itself is untouched
+    model.plants.grow = _timed(model.plants.grow, totals, 'growth')
+    model.find_nearest_target = _timed(model.find_nearest_target, totals, 'targets')
+    model.find_path = _timed(model.find_path, totals, 'pathfinding')
+    for _ in range(steps):
+        start_time = time.perf_counter()
+        model.step()
+        latencies.append(time.perf_counter() - start_time)
+    # Whatever step() spends outside the wrapped calls: task selection, moving and plant work
+    totals['movement'] = sum(latencies) - totals['growth'] - totals['targets'] - totals['pathfinding']
+    return latencies, totals
+
+
+def peak_memory(params, seed, steps):
+    # Separate pass because tracemalloc slows the run down too much to time it
+    tracemalloc.start()
+    try:
+        run_one(params, seed, steps)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark(config, seeds, steps, memory=True):
+    latencies = []
+    totals = dict.fromkeys(PHASES, 0.0)
+    for seed in seeds:
+        run_latencies, run_totals = run_one(config, seed, steps)
+        latencies.extend(run_latencies)
+        for phase in PHASES:
+            totals[phase] += run_totals[phase]
+
+    step_ms = np.array(latencies) * 1000
+    result = {
+        "config": config,
+        "seeds": list(seeds),
+        "steps": steps,
+        "step_ms": {
+            "mean": float(step_ms.mean()),
+            "p50": float(np.percentile(step_ms, 50)),
+            "p90": float(np.percentile(step_ms, 90)),
+            "p99": float(np.percentile(step_ms, 99)),
+            "max": float(step_ms.max()),
+        },
+        "total_s": float(sum(latencies)),
+        "split_s": {phase: totals[phase] for phase in PHASES},
+    }
+    if memory:
+        result["peak_memory_kb"] = max(peak_memory(config, seed, steps) for seed in seeds) / 1024
+    return result
+
+
+def config_key(config):
+    return tuple(sorted(config.items()))
+
+
+def compare(results, baseline, threshold):
+    """Prints new vs baseline p50/p99/total per config and returns the regressed configs."""
+    previous = {config_key(r["config"]): r for r in baseline["results"]}
+    regressions = []
+    width = max([len(format_config(r["config"])) for r in results] + [6])
+    print(f"{'config':<{width}} {'p50 ms':>16} {'p99 ms':>16} {'total s':>16}")
+    for result in results:
+        old = previous.get(config_key(result["config"]))
+        if old is None:
+            continue
+        pairs = [
+            (old["step_ms"]["p50"], result["step_ms"]["p50"]),
+            (old["step_ms"]["p99"], result["step_ms"]["p99"]),
+            (old["total_s"], result["total_s"]),
+        ]
+        regressed = [new > before * (1 + threshold) for before, new in pairs]
+        cells = [f"{before:.3g}->{new:.3g}{'!' if flag else ''}" for (before, new), flag in zip(pairs, regressed)]
+        print(f"{format_config(result['config']):<{width}} {cells[0]:>16} {cells[1]:>16} {cells[2]:>16}")
+        if any(regressed):
+            regressions.append(result["config"])
+    return regressions
+
+
+def format_config(config):
+    return " ".join(f"{key}={value}" for key, value in sorted(config.items()))
+
+
+def print_result(result):
+    step_ms = result["step_ms"]
+    split = result["split_s"]
+    total = result["total_s"] or 1.0
+    shares = " ".join(f"{phase} {split[phase] / total:.0%}" for phase in PHASES)
+    memory = f" peak {result['peak_memory_kb']:.0f}KB" if "peak_memory_kb" in result else ""
+    print(f"{format_config(result['config'])}: p50 {step_ms['p50']:.3f} ms, p99 {step_ms['p99']:.3f} ms,"
+          f" total {result['total_s']:.2f} s{memory} | {shares}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FarmModel.step over grid sizes and tractor counts")
+    parser.add_argument('--plant-grid-sizes', type=int, nargs='+', default=[5, 20, 50])
+    parser.add_argument('--path-widths', type=int, nargs='+', default=[2])
+    parser.add_argument('--tractors', type=int, nargs='+', default=[3, 10, 30])
+    parser.add_argument('--planners', nargs='+', default=['astar'],
+                        choices=['astar', 'cooperative', 'cached', 'dstar'])
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2])
+    parser.add_argument('--steps', type=int, default=100)
+    parser.add_argument('--fuel-capacity', type=int, default=10000,
+                        help='High by default so tractors keep working for every step')
+    parser.add_argument('--water-capacity', type=int, default=10000)
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc pass')
+    parser.add_argument('--output', default='bench_farmmodel.json')
+    parser.add_argument('--baseline', help='Previous output to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Relative slowdown that counts as a regression (default: 10%%)')
+    args = parser.parse_args()
+
+    results = []
+    for plant_grid_size, path_width, num_tractors, planner in itertools.product(
+            args.plant_grid_sizes, args.path_widths, args.tractors, args.planners):
+        config = {
+            'plant_grid_size': plant_grid_size,
+            'path_width': path_width,
+            'num_tractors': num_tractors,
+            'fuel_capacity': args.fuel_capacity,
+            'water_capacity': args.water_capacity,
+        }
+        # Left out for the default so older baselines still match
+        if planner != 'astar':
+            config['planner'] = planner
+        result = benchmark(config, args.seeds, args.steps, memory=not args.no_memory)
+        print_result(result)
+        results.append(result)
+
+    report = {
+        "machine": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "results": results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} configuration(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("No regressions")
+
+
+if __name__ == '__main__':
+    main()
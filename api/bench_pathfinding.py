@@ -0,0 +1,89 @@
+import argparse
+import random
+import time
+
+from pathfinding import GridPathfinder
+
+
+def legacy_find_path(grid_size, tractor_positions, start, end):
+    # Original FarmModel.find_path: sorted list frontier and a tractor scan per neighbor
+    if start == end:
+        return [start]
+
+    def h(pos):
+        return abs(pos[0] - end[0]) + abs(pos[1] - end[1])
+
+    def get_neighbors(pos):
+        x, y = pos
+        neighbors = []
+        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
+            new_x, new_y = x + dx, y + dy
+            if 0 <= new_x < grid_size and 0 <= new_y < grid_size:
+                if not any(t == (new_x, new_y) for t in tractor_positions if t != start):
+                    neighbors.append((new_x, new_y))
+        return neighbors
+
+    frontier = [(h(start), start)]
+    came_from = {start: None}
+    cost_so_far = {start: 0}
+
+    while frontier:
+        _, current = frontier.pop(0)
+        if current == end:
+            break
+
+        for next_pos in get_neighbors(current):
+            new_cost = cost_so_far[current] + 1
+            if next_pos not in cost_so_far or new_cost < cost_so_far[next_pos]:
+                cost_so_far[next_pos] = new_cost
+                priority = new_cost + h(next_pos)
+                frontier.append((priority, next_pos))
+                frontier.sort()
+                came_from[next_pos] = current
+
+    if end not in came_from:
+        return None
+
+    path = []
+    current = end
+    while current is not None:
+        path.append(current)
+        current = came_from[current]
+    return path[::-1]
+
+
+def run(grid_size, num_tractors, num_queries, seed):
+    rng = random.Random(seed)
+    cells = [(x, y) for x in range(grid_size) for y in range(grid_size)]
+    tractors = rng.sample(cells, num_tractors)
+    free = [c for c in cells if c not in set(tractors)]
+    queries = [(rng.choice(tractors), rng.choice(free)) for _ in range(num_queries)]
+
+    start_time = time.perf_counter()
+    pathfinder = GridPathfinder(grid_size)
+    pathfinder.rebuild_occupancy(tractors)
+    new_paths = [pathfinder.find_path(s, e) for s, e in queries]
+    new_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    old_paths = [legacy_find_path(grid_size, tractors, s, e) for s, e in queries]
+    old_time = time.perf_counter() - start_time
+
+    for old, new in zip(old_paths, new_paths):
+        if (old is None) != (new is None) or (old and len(old) != len(new)):
+            raise AssertionError(f"Path length mismatch: {old and len(old)} != {new and len(new)}")
+
+    print(f"grid={grid_size} tractors={num_tractors} queries={num_queries}")
+    print(f"  legacy:  {old_time:.3f} s ({old_time / num_queries * 1000:.2f} ms/query)")
+    print(f"  heap A*: {new_time:.3f} s ({new_time / num_queries * 1000:.2f} ms/query, includes grid setup)")
+    print(f"  speedup: {old_time / new_time:.1f}x, path lengths match")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare the heap A* against the original find_path")
+    parser.add_argument('--grid-size', type=int, default=60)
+    parser.add_argument('--tractors', type=int, default=50)
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    run(args.grid_size, args.tractors, args.queries, args.seed)
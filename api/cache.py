@@ -0,0 +1,101 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+# Bump when a model change makes previously cached results stale
+CACHE_VERSION = 1
+
+
+def cache_key(params):
+    # Content address of a normalized parameter set (including the seed)
+    normalized = json.dumps({"version": CACHE_VERSION, "params": params},
+                            sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Two-level LRU cache of simulation results keyed by ``cache_key``.
+
+    Recent results stay in memory (``max_entries``); every result is also
+    written gzipped to ``directory``, whose total size is capped at
+    ``max_bytes`` by evicting the least recently used files.
+    """
+
+    def __init__(self, directory, max_entries=32, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json.gz")
+
+    def _remember(self, key, result):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, params):
+        key = cache_key(params)
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return self.memory[key]
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                result = json.load(f)
+            os.utime(path)  # Mark as recently used for disk eviction
+        except (OSError, ValueError):
+            return None
+        with self.lock:
+            self._remember(key, result)
+        return result
+
+    def put(self, params, result):
+        key = cache_key(params)
+        with self.lock:
+            self._remember(key, result)
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(result, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        self._evict_disk()
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json.gz'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith('.json.gz'):
+                os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,147 @@
+import heapq
+
+
+INF = float('inf')
+
+
+class DStarLite:
+    """D* Lite from one tractor to a fixed goal over a GridPathfinder's grid.
+
+    The search runs backwards from the goal, so ``g[cell]`` is the distance
+    from a cell to the goal, and entering a cell with a tractor on it costs
+    infinity. After the tractor moves or other tractors get in the way,
+    ``path_from`` reads the cells that changed from the pathfinder's
+    ``changes`` log and only the vertices around them are updated, instead of
+    searching the whole grid again, so the pathfinder has to be built with
+    ``log_changes=True``.
+    """
+
+    def __init__(self, pathfinder, start, goal):
+        if not pathfinder.log_changes:
+            raise ValueError("DStarLite needs a GridPathfinder with log_changes=True")
+        self.pathfinder = pathfinder
+        self.goal = pathfinder.index(goal)
+        self.expanded = 0
+        self.reset(pathfinder.index(start))
+
+    def reset(self, start_cell):
+        pathfinder = self.pathfinder
+        self.start = self.last = start_cell
+        self.km = 0
+        self.g = {}
+        self.rhs = {self.goal: 0}
+        self.queued = {}        # cell -> key of its live heap entry
+        self.queue = []
+        self.synced = pathfinder.changes_base + len(pathfinder.changes)
+        self.push(self.goal)
+
+    def h(self, cell):
+        # Distance from the tractor, the search's target
+        x, y = divmod(cell, self.pathfinder.size)
+        sx, sy = divmod(self.start, self.pathfinder.size)
+        return abs(x - sx) + abs(y - sy)
+
+    def key(self, cell):
+        best = min(self.g.get(cell, INF), self.rhs.get(cell, INF))
+        return (best + self.h(cell) + self.km, best)
+
+    def push(self, cell):
+        key = self.key(cell)
+        self.queued[cell] = key
+        heapq.heappush(self.queue, (key, cell))
+
+    def top(self):
+        # Drop heap entries left behind by later pushes or removals
+        queue = self.queue
+        while queue and self.queued.get(queue[0][1]) != queue[0][0]:
+            heapq.heappop(queue)
+        return queue[0] if queue else None
+
+    def update(self, cell):
+        if cell != self.goal:
+            occupancy = self.pathfinder.occupancy
+            g = self.g
+            best = INF
+            for next_cell in self.pathfinder.neighbors_of(cell):
+                if not occupancy[next_cell]:
+                    cost = g.get(next_cell, INF) + 1
+                    if cost < best:
+                        best = cost
+            self.rhs[cell] = best
+        self.queued.pop(cell, None)
+        if self.g.get(cell, INF) != self.rhs.get(cell, INF):
+            self.push(cell)
+
+    def compute(self):
+        g = self.g
+        rhs = self.rhs
+        neighbors_of = self.pathfinder.neighbors_of
+        start = self.start
+        while True:
+            top = self.top()
+            if top is None:
+                break
+            key_old, cell = top
+            if key_old >= self.key(start) and rhs.get(start, INF) == g.get(start, INF):
+                break
+            key_new = self.key(cell)
+            if key_old < key_new:
+                self.push(cell)
+                continue
+            del self.queued[cell]
+            self.expanded += 1
+            if g.get(cell, INF) > rhs.get(cell, INF):
+                g[cell] = rhs[cell]
+            else:
+                g[cell] = INF
+                self.update(cell)
+            for prev_cell in neighbors_of(cell):
+                self.update(prev_cell)
+
+    def sync(self, start_cell):
+        """Catches up on the tractor's new cell and the occupancy changes since the last call."""
+        pathfinder = self.pathfinder
+        if self.synced < pathfinder.changes_base:
+            self.reset(start_cell)
+            return
+        if start_cell != self.start:
+            self.start = start_cell
+            self.km += self.h(self.last)
+            self.last = start_cell
+        changed = set(pathfinder.changes[self.synced - pathfinder.changes_base:])
+        self.synced = pathfinder.changes_base + len(pathfinder.changes)
+        # A cell's occupancy only changes the cost of entering it, so its neighbors are the ones to update
+        neighbors_of = pathfinder.neighbors_of
+        for cell in changed:
+            for prev_cell in neighbors_of(cell):
+                self.update(prev_cell)
+
+    def path_from(self, start):
+        """Path from ``start`` to the goal around tractors, as in GridPathfinder.find_path."""
+        pathfinder = self.pathfinder
+        before = self.expanded
+        self.sync(pathfinder.index(start))
+        self.compute()
+        pathfinder.expanded += self.expanded - before
+
+        g = self.g
+        occupancy = pathfinder.occupancy
+        neighbors_of = pathfinder.neighbors_of
+        cell = self.start
+        if g.get(cell, INF) == INF:
+            return None
+        cells = [cell]
+        while cell != self.goal:
+            best, best_cost = None, INF
+            for next_cell in neighbors_of(cell):
+                if occupancy[next_cell]:
+                    continue
+                cost = g.get(next_cell, INF)
+                if cost < best_cost:
+                    best, best_cost = next_cell, cost
+            # Values that are still stale can point back along the path
+            if best is None or len(cells) > len(occupancy):
+                return None
+            cell = best
+            cells.append(cell)
+        return [pathfinder.position(cell) for cell in cells]
@@ -1,13 +1,28 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 import agentpy as ap
+import logging
 import numpy as np
+import os
 import pygame
 import sys
+import threading
+import uuid
 from collections import deque
-import json  # Import json module for handling JSON operations
+from contextlib import suppress
+from instrumentation import Instrumentation, profile_summary, profiling
+from pathfinding import GridPathfinder
+from plants import PlantField
+from cache import ResultCache
+from dstar import DStarLite
+from jobs import JobQueue
+from recording import dumps_line, open_writer
+from reservations import ReservationTable
 
 app = Flask(__name__)
 
+# Per-action messages are DEBUG; warnings and errors still show without any logging setup
+logger = logging.getLogger('farmmodel')
+
 # Initialize pygame
 #pygame.init()
 PLANT_GRID_SIZE = 5  
@@ -16,32 +31,25 @@ GRID_SIZE = PLANT_GRID_SIZE + (PATH_WIDTH * 2)
 WIDTH, HEIGHT = 600, 600  
 CELL_SIZE = WIDTH // GRID_SIZE
 FPS = 2
+OUTPUT_PATH = 'tractor_statuses.ndjson'
+TRAJECTORY_PATH = 'tractor_statuses.traj'
+CACHE_DIR = 'simulation_cache'
+# Output files of /initialize runs, one per request; only the newest MAX_RUN_FILES are kept
+RUNS_DIR = 'simulation_runs'
+MAX_RUN_FILES = 20
+run_files_lock = threading.Lock()
 
 
-parameters = {}
+# Simulaciones en segundo plano para /initialize con "async": true
+jobs = JobQueue()
+# Resultados de corridas con semilla explícita, que son deterministas
+result_cache = ResultCache(CACHE_DIR)
 
 
 # agentes
-class Plant(ap.Agent):
-    def setup(self):
-        self.maturity = 0
-        self.watered = False
-        self.harvested = False
-        self.position = None
-
-    def needs_water(self):
-        return not self.watered and not self.harvested and self.maturity < 5
-
-    def is_ready_for_harvest(self):
-        return self.maturity >= 5 and not self.harvested
-
-    def grow(self):
-        if self.watered and not self.harvested and self.maturity < 5:
-            self.maturity += 1
-
 class Silo(ap.Agent):
     def setup(self):
-        self.position = (GRID_SIZE - 1, 0)
+        self.position = (self.model.grid_size - 1, 0)
 
 class Tractor(ap.Agent):
     def setup(self):
@@ -58,43 +66,40 @@ class Tractor(ap.Agent):
 
     def move_to(self, target_pos):
         if self.fuel_level > 0:
+            # Keep the model's tractor occupancy index in sync
+            self.model.pathfinder.move(self.position, target_pos)
             self.position = target_pos
             self.fuel_level = max(0, self.fuel_level - 1)
             return True
         return False
 
-    def perform_task(self, plant):
-        if self.task == "watering" and plant.needs_water() and self.water_level > 0:
-            plant.watered = True
+    def perform_task(self, plants, pos):
+        if self.task == "watering" and plants.needs_water(pos) and self.water_level > 0:
+            plants.water(pos)
             self.water_level = max(0, self.water_level - 1)
             return True
-        elif self.task == "harvesting" and plant.is_ready_for_harvest() and self.wheat_level < self.wheat_capacity:
-            plant.harvested = True
+        elif self.task == "harvesting" and plants.is_ready_for_harvest(pos) and self.wheat_level < self.wheat_capacity:
+            plants.harvest(pos)
             self.wheat_level += 1
             return True
         return False
 
     def deposit_wheat(self):
+        delivered = self.wheat_level
         self.wheat_level = 0
+        return delivered
 
 class FarmModel(ap.Model):
     def initialize(self):
-        self.grid = ap.Grid(self, [GRID_SIZE, GRID_SIZE])
-    
-        self.plants = []
-        positions = []
-    
-        for y in range(PATH_WIDTH, GRID_SIZE - PATH_WIDTH):
-            for x in range(PATH_WIDTH, GRID_SIZE - PATH_WIDTH):
-                plant = Plant(self)
-                plant.setup()
-                plant.position = (x, y)
-                self.plants.append(plant)
-                positions.append((x, y))
-        
-        # Convert plants to AgentList and add them to the grid
-        self.plants = ap.AgentList(self, self.plants)
-        self.grid.add_agents(self.plants, positions)
+        # Grid geometry belongs to the model so differently sized farms can run side by side
+        self.plant_grid_size = self.p.get('plant_grid_size', PLANT_GRID_SIZE)
+        self.path_width = self.p.get('path_width', PATH_WIDTH)
+        self.grid_size = self.plant_grid_size + (self.path_width * 2)
+        grid_size, path_width = self.grid_size, self.path_width
+
+        # Plant state lives in NumPy arrays covering the field inside the paths
+        self.plants = PlantField(path_width, self.plant_grid_size)
+        self.wheat_delivered = 0
         
         # Initialize tractors
         self.tractors = []
@@ -104,21 +109,30 @@ class FarmModel(ap.Model):
         path_positions = []
         
         # Logic to create tractors
-        for x in range(GRID_SIZE):
-            for y in range(PATH_WIDTH):
+        for x in range(grid_size):
+            for y in range(path_width):
                 path_positions.append((x, y))
-            for y in range(GRID_SIZE - PATH_WIDTH, GRID_SIZE):  
+            for y in range(grid_size - path_width, grid_size):  
                 path_positions.append((x, y))
                 
-        for y in range(PATH_WIDTH, GRID_SIZE - PATH_WIDTH):
-            for x in range(PATH_WIDTH):  
+        for y in range(path_width, grid_size - path_width):
+            for x in range(path_width):  
                 path_positions.append((x, y))
-            for x in range(GRID_SIZE - PATH_WIDTH, GRID_SIZE):
+            for x in range(grid_size - path_width, grid_size):
                 path_positions.append((x, y))
+
+        # path_mask[x, y] is True on the road ring around the plant field
+        self.path_mask = np.zeros((grid_size, grid_size), dtype=bool)
+        if path_positions:
+            self.path_mask[tuple(np.array(path_positions).T)] = True
         
+        # An explicit seed makes tractor placement, and so the whole run, reproducible
+        seed = self.p.get('seed')
+        rng = np.random.RandomState(seed) if seed is not None else np.random
+
         for i in range(self.p['num_tractors']):
             while True:
-                pos = path_positions[np.random.randint(len(path_positions))]
+                pos = path_positions[rng.randint(len(path_positions))]
                 if pos not in tractor_positions:
                     tractor = Tractor(self)
                     tractor.setup()
@@ -128,222 +142,407 @@ class FarmModel(ap.Model):
                     break
         
         self.tractors = ap.AgentList(self, self.tractors)
-        self.grid.add_agents(self.tractors, tractor_positions)
         
         # Initialize silo
         self.silo = Silo(self)
         self.silo.setup()
-        self.grid.add_agents([self.silo], [self.silo.position])
+
+        # 'cached' repairs cached static paths around tractors, 'dstar' keeps a D* Lite search per tractor
+        self.planner = self.p.get('planner', 'astar')
+
+        # Pathfinding engine, neighbor table is built once per grid; only D* Lite reads the occupancy change log
+        self.pathfinder = GridPathfinder(grid_size, log_changes=self.planner == 'dstar')
+        # Tractor occupancy, updated incrementally by Tractor.move_to
+        self.pathfinder.rebuild_occupancy(tractor_positions)
+
+        # 'cooperative' plans tractors against each other's reserved cells (WHCA*)
+        self.reservations = None
+        if self.planner == 'cooperative':
+            self.reservations = ReservationTable(self.pathfinder, self.p.get('window', 8))
+            self.road_cells = np.argwhere(self.path_mask)
+            self.tractors_by_id = {tractor.id: tractor for tractor in self.tractors}
+            # Tractor heading to the silo; the other full tractors wait out of the way
+            self.silo_claim = None
+            for tractor in self.tractors:
+                self.reservations.park(tractor.id, tractor.position, 0)
+        self.dstar = {}
+        self.tick = 0
+
+        # Counters and timers for the hot paths, returned with the result on request
+        self.stats = Instrumentation()
         
-        print(f"Setup complete: {len(self.plants)} plants, {len(self.tractors)} tractors, 1 silo")
+        logger.info("Setup complete: %d plants, %d tractors, 1 silo", len(self.plants), len(self.tractors))
         return True
 
-    def find_path(self, start, end):
-        if start == end:
-            return [start]
-            
-        def h(pos):
-            return abs(pos[0] - end[0]) + abs(pos[1] - end[1])
-        
-        def get_neighbors(pos):
-            x, y = pos
-            neighbors = []
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                new_x, new_y = x + dx, y + dy
-                if 0 <= new_x < GRID_SIZE and 0 <= new_y < GRID_SIZE:
-                    is_path = (new_x < PATH_WIDTH or 
-                             new_x >= GRID_SIZE - PATH_WIDTH or 
-                             new_y < PATH_WIDTH or 
-                             new_y >= GRID_SIZE - PATH_WIDTH)
-                    is_target = (new_x, new_y) == end
-                    if not any(t.position == (new_x, new_y) 
-                        for t in self.tractors if t.position != start):
-                            neighbors.append((new_x, new_y))
-            return neighbors
-        
-        frontier = [(h(start), start)]
-        came_from = {start: None}
-        cost_so_far = {start: 0}
-        
-        while frontier:
-            _, current = frontier.pop(0)
-            if current == end:
-                break
-                
-            for next_pos in get_neighbors(current):
-                new_cost = cost_so_far[current] + 1
-                if next_pos not in cost_so_far or new_cost < cost_so_far[next_pos]:
-                    cost_so_far[next_pos] = new_cost
-                    priority = new_cost + h(next_pos)
-                    frontier.append((priority, next_pos))
-                    frontier.sort()
-                    came_from[next_pos] = current
-        
-        if end not in came_from:
-            return None
-        
-        path = []
-        current = end
-        while current is not None:
-            path.append(current)
-            current = came_from[current]
-        return path[::-1]
-
-    def find_nearest_target(self, tractor):
+    def find_path(self, start, end, tractor=None):
+        with self.stats.timer('find_path'):
+            if tractor is not None and self.reservations is not None:
+                path = self.reservations.plan(tractor.id, start, end, self.tick)
+                # Tractors that were only waiting in the way plan again on their next turn
+                for owner in self.reservations.bumped:
+                    self.tractors_by_id[owner].current_path.clear()
+                self.reservations.bumped.clear()
+            elif tractor is not None and self.planner == 'cached':
+                path = self.pathfinder.find_path_cached(start, end)
+            elif tractor is not None and self.planner == 'dstar':
+                planner = self.dstar.get(tractor.id)
+                if planner is None or planner.goal != self.pathfinder.index(end):
+                    planner = self.dstar[tractor.id] = DStarLite(self.pathfinder, start, end)
+                path = planner.path_from(start)
+            else:
+                path = self.pathfinder.find_path(start, end)
+        if path is None:
+            self.stats.count('paths_not_found')
+        return path
+
+    def repair_path(self, tractor, blocked_pos):
+        # Route around the tractor on blocked_pos, touching only the cells near it
+        with self.stats.timer('repair_path'):
+            if self.planner == 'dstar':
+                path = self.dstar[tractor.id].path_from(tractor.position)
+            else:
+                path = self.pathfinder.repair([tractor.position, blocked_pos] + list(tractor.current_path))
+        if path is None:
+            # Nothing gets through right now: skip the blocked cell like the default planner does
+            self.stats.count('repairs_failed')
+            return tractor.current_path
+        return deque(path[1:])
+
+    def find_nearest_target(self, tractor, claim=True):
         if tractor.task == "watering":
-            targets = [p for p in self.plants if p.needs_water()]
+            targets = self.plants.water_targets
         elif tractor.task == "harvesting":
-            targets = [p for p in self.plants if p.is_ready_for_harvest()]
+            targets = self.plants.harvest_targets
         else:  # Heading to silo
-            targets = [self.silo]
-        
-        if not targets:
+            return self.silo.position
+
+        with self.stats.timer('find_nearest_target'):
+            pos = targets.nearest(tractor.position)
+        if pos is None:
+            self.stats.count('targets_not_found')
             return None
-            
-        return min(targets, 
-                  key=lambda p: abs(p.position[0] - tractor.position[0]) + 
-                               abs(p.position[1] - tractor.position[1]))
+        # Claimed plants are skipped by other tractors until released
+        if claim:
+            targets.claim(pos, tractor.id)
+        return pos
+
+    def is_finished(self):
+        return self.plants.harvested_count == len(self.plants)
+
+    def fuel_used(self):
+        return sum(t.fuel_capacity - t.fuel_level for t in self.tractors)
+
+    def release_target(self, tractor):
+        self.plants.water_targets.release(tractor.id)
+        self.plants.harvest_targets.release(tractor.id)
+
+    def silo_target(self, tractor):
+        if self.reservations is None:
+            return self.silo.position
+        if self.silo_claim is None:
+            self.silo_claim = tractor.id
+        return self.silo.position if self.silo_claim == tractor.id else None
+
+    def road_target(self, tractor):
+        # Cooperative mode: a tractor with no work leaves the field so parked tractors do not wall others in
+        if self.path_mask[tractor.position]:
+            return None
+        distances = np.abs(self.road_cells - tractor.position).sum(axis=1)
+        for i in np.argsort(distances, kind='stable'):
+            pos = (int(self.road_cells[i, 0]), int(self.road_cells[i, 1]))
+            if self.reservations.parked_on(pos) is None:
+                return pos
+        return None
+
+    def stats_summary(self):
+        summary = self.stats.summary()
+        summary["counters"]["astar_expanded"] = self.pathfinder.expanded
+        if self.reservations is not None:
+            summary["counters"]["reservation_expanded"] = self.reservations.expanded
+        if self.planner == 'cached':
+            summary["counters"]["path_cache_hits"] = self.pathfinder.cache_hits
+            summary["counters"]["path_repairs"] = self.pathfinder.repairs
+        return summary
 
     def step(self):
-        # Grow all plants
-        for plant in self.plants:
-            plant.grow()
+        with self.stats.timer('step'):
+            # Grow all plants
+            self.plants.grow()
         
-        for tractor in self.tractors:
-            if tractor.fuel_level <= 0:
-                continue  # Skip tractors that have no fuel
+            for tractor in self.tractors:
+                if tractor.fuel_level <= 0:
+                    self.release_target(tractor)
+                    if self.reservations is not None:
+                        if self.silo_claim == tractor.id:
+                            self.silo_claim = None
+                        self.reservations.park(tractor.id, tractor.position, self.tick, can_yield=False)
+                    continue  # Skip tractors that have no fuel
             
-            # Prioritize tasks: depositing > watering > harvesting > idle
-            if tractor.wheat_level >= tractor.wheat_capacity:
-                tractor.task = "depositing"
-            elif any(plant.needs_water() for plant in self.plants):
-                tractor.task = "watering"
-            elif any(plant.is_ready_for_harvest() for plant in self.plants):
-                tractor.task = "harvesting"
-            else:
-                tractor.task = "idle"
-            
-            # If the tractor has no current path, assign a new target
-            if not tractor.current_path:
-                if tractor.task == "depositing":
-                    target = self.silo
+                # Prioritize tasks: depositing > watering > harvesting > idle
+                if tractor.wheat_level >= tractor.wheat_capacity:
+                    tractor.task = "depositing"
+                elif self.plants.needs_water_count:
+                    tractor.task = "watering"
+                elif self.plants.ready_count:
+                    tractor.task = "harvesting"
                 else:
-                    target = self.find_nearest_target(tractor)
-                if target:
-                    path = self.find_path(tractor.position, target.position)
-                    if path:
-                        tractor.current_path = deque(path)
+                    tractor.task = "idle"
+            
+                # If the tractor has no current path, assign a new target
+                if not tractor.current_path:
+                    self.release_target(tractor)
+                    if tractor.task == "depositing":
+                        target = self.silo_target(tractor)
+                    else:
+                        target = self.find_nearest_target(tractor)
+                    if target is None and self.reservations is not None:
+                        target = self.road_target(tractor)
+                    # In cooperative mode a tractor without a target still plans, to wait or give way
+                    if target or self.reservations is not None:
+                        path = self.find_path(tractor.position, target, tractor)
+                        if path:
+                            tractor.current_path = deque(path)
             
-            # Move the tractor along its path
-            if tractor.current_path:
-                next_pos = tractor.current_path.popleft()
-                # Ensure no collision with other tractors
-                if next_pos not in [t.position for t in self.tractors if t.position != tractor.position]:
-                    if tractor.move_to(next_pos):
-                        if tractor.task == "depositing" and tractor.position == self.silo.position:
-                            tractor.deposit_wheat()
-                            print(f"Tractor at {tractor.position} deposited wheat.")
-                        else:
-                            # Perform task on the current position after moving
-                            target_plant = next(
-                                (p for p in self.plants if p.position == tractor.position), None)
-                            if target_plant:
-                                success = tractor.perform_task(target_plant)
-                                if success:
-                                    print(f"Tractor at {tractor.position} performed {tractor.task} on plant.")
-                                else:
-                                    print(f"Tractor at {tractor.position} failed to perform {tractor.task} on plant.")
+                # Move the tractor along its path
+                if tractor.current_path:
+                    next_pos = tractor.current_path.popleft()
+                    # Ensure no collision with other tractors
+                    if next_pos == tractor.position or not self.pathfinder.is_occupied(next_pos):
+                        # Waiting in place for a reserved cell costs no fuel
+                        waiting = self.reservations is not None and next_pos == tractor.position
+                        if waiting or tractor.move_to(next_pos):
+                            if waiting:
+                                # The cell was already worked on arrival; a wait is not another attempt
+                                pass
+                            elif tractor.task == "depositing" and tractor.position == self.silo.position:
+                                self.wheat_delivered += tractor.deposit_wheat()
+                                if self.reservations is not None and self.silo_claim == tractor.id:
+                                    self.silo_claim = None
+                                logger.debug("Tractor at %s deposited wheat.", tractor.position)
+                            else:
+                                # Perform task on the current position after moving
+                                if tractor.position in self.plants:
+                                    success = tractor.perform_task(self.plants, tractor.position)
+                                    if success:
+                                        logger.debug("Tractor at %s performed %s on plant.", tractor.position, tractor.task)
+                                    else:
+                                        self.stats.count('failed_tasks')
+                                        logger.debug("Tractor at %s failed to perform %s on plant.", tractor.position, tractor.task)
+                        elif self.reservations is not None:
+                            # Out of fuel mid-plan: stay here and give up the rest of the plan
+                            tractor.current_path.clear()
+                            self.reservations.park(tractor.id, tractor.position, self.tick, can_yield=False)
+                    else:
+                        self.stats.count('collisions_avoided')
+                        if self.reservations is not None:
+                            tractor.current_path.clear()
+                            self.reservations.park(tractor.id, tractor.position, self.tick)
+                        elif self.planner in ('cached', 'dstar'):
+                            tractor.current_path = self.repair_path(tractor, next_pos)
+
+            self.tick += 1
     
     # Optionally, reset watered status if needed (e.g., end of day)
-    # for plant in self.plants:
-    #     plant.watered = False
-
-
+    # self.plants.watered[:] = False
+
+
+
+
+def parse_parameters(data):
+    # Regresa (parámetros, None) o (None, respuesta de error); no modifica estado global
+    if data is None:
+        return None, (jsonify({"error": "Invalid JSON data"}), 400)
+
+    logger.debug("Received data: %s", data)
+    required_keys = ['plant_grid_size', 'path_width', 'num_tractors', 'water_capacity', 'fuel_capacity', 'steps']
+    missing_keys = [key for key in required_keys if key not in data]
+    if missing_keys:
+        return None, (jsonify({"error": f"Missing required keys: {', '.join(missing_keys)}"}), 400)
+
+    params = {
+        'plant_grid_size': data['plant_grid_size'],
+        'path_width': data['path_width'],
+        'num_tractors': data['num_tractors'],
+        'water_capacity': data['water_capacity'],
+        'fuel_capacity': data['fuel_capacity'],
+        'wheat_capacity': data['wheat_capacity'],
+        'steps': data['steps'],
+        'seed': data.get('seed'),
+        'planner': data.get('planner', 'astar'),
+    }
+    if params['planner'] not in ('astar', 'cooperative', 'cached', 'dstar'):
+        return None, (jsonify({"error": f"Unknown planner: {params['planner']}"}), 400)
+    return params, None
+
+
+def new_run_path(extension):
+    # Overlapping requests each write their own file instead of truncating a shared one
+    with run_files_lock:
+        os.makedirs(RUNS_DIR, exist_ok=True)
+        runs = sorted((entry for entry in os.scandir(RUNS_DIR) if entry.is_file()),
+                      key=lambda entry: entry.stat().st_mtime)
+        for entry in runs[:max(0, len(runs) - MAX_RUN_FILES + 1)]:
+            with suppress(OSError):
+                os.remove(entry.path)
+    return os.path.join(RUNS_DIR, uuid.uuid4().hex + extension)
 
 
 @app.route('/initialize', methods=['POST']) 
 def initialize_values():
     try:
         data = request.get_json()
-        if data is None:
-            return jsonify({"error": "Invalid JSON data"}), 400
-    
-        print("Recieved data: ", data)
-        required_keys = ['plant_grid_size', 'path_width', 'num_tractors', 'water_capacity', 'fuel_capacity', 'steps']
-        missing_keys = [key for key in required_keys if key not in data]
-        if missing_keys:
-            return jsonify({"error": f"Missing required keys: {', '.join(missing_keys)}"}), 400
-    
-        global PLANT_GRID_SIZE, PATH_WIDTH
-        PLANT_GRID_SIZE = data['plant_grid_size']
-        PATH_WIDTH = data['path_width']
-
-        global parameters
-        parameters = {
-            'num_tractors': data['num_tractors'],
-            'water_capacity': data['water_capacity'],
-            'fuel_capacity': data['fuel_capacity'],
-            'wheat_capacity': data['wheat_capacity'],
-            'steps': data['steps']
-        }
+        params, error = parse_parameters(data)
+        if error:
+            return error
+
+        # "stats" returns counters and timers with the steps, "profile" adds a cProfile capture
+        profile = bool(data.get('profile'))
+        want_stats = profile or bool(data.get('stats'))
+
+        if data.get('async'):
+            job = jobs.submit(lambda: simulate_steps(params), total=params['steps'])
+            return jsonify({"job_id": job.id, "status": job.status}), 202
+
+        # A cached result has no timings to report, so measured runs always simulate
+        if params['seed'] is not None and not want_stats:
+            cached = result_cache.get(params)
+            if cached is not None:
+                return jsonify(cached)
+
+        if data.get('format') == 'binary':
+            extension = os.path.splitext(TRAJECTORY_PATH)[1]
+        else:
+            extension = os.path.splitext(OUTPUT_PATH)[1] + ('.gz' if data.get('compress') else '')
+        output_path = new_run_path(extension)
+        stats = {} if want_stats else None
+        with profiling(profile) as profiler:
+            result = initialize_simulation(params, output_path=output_path, stats=stats)
+        if params['seed'] is not None:
+            result_cache.put(params, result)
+        if not want_stats:
+            response = jsonify(result)
+        else:
+            if profiler is not None:
+                stats["profile"] = profile_summary(profiler)
+            response = jsonify({"steps": result, "stats": stats})
+        response.headers['X-Output-Path'] = output_path
+        return response
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        GRID_SIZE = PLANT_GRID_SIZE + (PATH_WIDTH * 2)
-        CELL_SIZE = WIDTH // GRID_SIZE
 
-        result = initialize_simulation()
-        return jsonify(result)
+@app.route('/simulate/stream', methods=['POST'])
+def simulate_stream():
+    try:
+        data = request.get_json()
+        params, error = parse_parameters(data)
+        if error:
+            return error
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+    # Un paso por línea (NDJSON), enviado con chunked transfer mientras corre la simulación
+    def generate():
+        for current_step in simulate_steps(params):
+            yield dumps_line(current_step)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    return jsonify(job.progress())
+
+
+@app.route('/jobs/<job_id>/results', methods=['GET'])
+def job_results(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    start = request.args.get('start', default=0, type=int)
+    end = request.args.get('end', default=None, type=int)
+    if start < 0 or (end is not None and end < start):
+        return jsonify({"error": "Invalid step range"}), 400
+    return jsonify(job.page(start, end))
+
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    return jsonify(job.progress())
+
 
 @app.route('/test', methods=['GET'])
 def test():
     return jsonify({"message": "Hello, World!"})
 
-def initialize_simulation():
+def tractor_status(model, step_count):
+    current_step = {"step": step_count, "tractors": []}
+    for tractor in model.tractors:
+        tractor_info = {
+            "position": list(tractor.position),  # [x, y]
+            "task": tractor.task,
+            "water_level": tractor.water_level,
+            "fuel_level": tractor.fuel_level,
+            "wheat_level": tractor.wheat_level
+        }
+        current_step["tractors"].append(tractor_info)
+    return current_step
+
+def simulate_steps(params, stats=None):
     # creación y inicialización del modelo
-    model = FarmModel(parameters)
+    model = FarmModel(params)
     if not model.initialize():
-        print("Failed to initialize model")
+        logger.error("Failed to initialize model")
         sys.exit(1)
 
-
-    tractor_status_over_time = []
-    running = True
     step_count = 0
-
-    while running and step_count < parameters['steps']:
-        try:
-            model.step()
+    try:
+        while step_count < params['steps']:
+            try:
+                model.step()
+            except Exception:
+                # A truncated run must not look like a finished one (or end up in the cache)
+                logger.exception("Error during simulation at step %d", step_count)
+                raise
             # recolección de estado de tractores
-            current_step = {"step": step_count, "tractors": []}
-            for tractor in model.tractors:
-                tractor_info = {
-                    "position": list(tractor.position),  # [x, y]
-                    "task": tractor.task,
-                    "water_level": tractor.water_level,
-                    "fuel_level": tractor.fuel_level,
-                    "wheat_level": tractor.wheat_level
-                }
-                current_step["tractors"].append(tractor_info)
-            
-            tractor_status_over_time.append(current_step)
-            
+            yield tractor_status(model, step_count)
             step_count += 1
-        except Exception as e:
-            print(f"Error during simulation: {e}")
-            running = False
-
-    # guardado del estado de tractores por cada paso en un archivo JSON
+    finally:
+        # resumen de contadores y tiempos, también si el consumidor se detiene antes
+        if stats is not None:
+            stats.update(model.stats_summary())
+            stats["steps"] = step_count
+
+def initialize_simulation(params, output_path=OUTPUT_PATH, collect=True, stats=None):
+    # guardado del estado de tractores, una línea por paso mientras corre la simulación
+    writer = None
     try:
-        with open('tractor_statuses.json', 'w') as f:
-            json.dump(tractor_status_over_time, f, indent=4)
-        print("Tractor statuses saved to tractor_statuses.json")
+        writer = open_writer(output_path, params)
     except Exception as e:
-        print(f"Failed to save tractor statuses: {e}")
-    
+        logger.warning("Failed to save tractor statuses: %s", e)
+
+    tractor_status_over_time = [] if collect else None
+    try:
+        for current_step in simulate_steps(params, stats):
+            if writer:
+                writer.write(current_step)
+            if collect:
+                tractor_status_over_time.append(current_step)
+    finally:
+        if writer:
+            writer.close()
+            logger.info("Tractor statuses saved to %s", output_path)
+
     return tractor_status_over_time
 
 
 if __name__ == '__main__':
+    # FARM_LOG_LEVEL=DEBUG shows every tractor action
+    logging.basicConfig(level=os.environ.get('FARM_LOG_LEVEL', 'WARNING'))
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,75 @@
+import cProfile
+import pstats
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class Instrumentation:
+    """Named counters and accumulated timers for one simulation run.
+
+    Timers keep the call count and total seconds per name, so the summary can
+    report both where the time went and how often each hot path ran.
+    """
+
+    def __init__(self):
+        self.counters = defaultdict(int)
+        self.totals = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def add_time(self, name, seconds):
+        self.totals[name] += seconds
+        self.calls[name] += 1
+
+    @contextmanager
+    def timer(self, name):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start_time)
+
+    def summary(self):
+        return {
+            "counters": dict(self.counters),
+            "timers": {
+                name: {
+                    "calls": self.calls[name],
+                    "total_ms": total * 1000,
+                    "mean_ms": total * 1000 / self.calls[name],
+                }
+                for name, total in self.totals.items()
+            },
+        }
+
+
+@contextmanager
+def profiling(enabled=True):
+    # Yields the cProfile.Profile (None when disabled); it only sees the calling thread
+    if not enabled:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+
+
+def profile_summary(profiler, limit=25):
+    # Top functions by cumulative time, as JSON-friendly rows
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+        rows.append({
+            "function": f"{filename}:{line}({function})",
+            "calls": calls,
+            "total_ms": total * 1000,
+            "cumulative_ms": cumulative * 1000,
+        })
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[:limit]
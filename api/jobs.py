@@ -0,0 +1,100 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job:
+    def __init__(self, job_id, total):
+        self.id = job_id
+        self.total = total
+        self.status = "queued"
+        self.results = []
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.cancel_event = threading.Event()
+
+    def is_done(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    def progress(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "completed": len(self.results),
+            "total": self.total,
+            "error": self.error,
+        }
+
+    def page(self, start=0, end=None):
+        # Snapshot of a slice of the results; safe while the job is still running
+        results = self.results[start:end]
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "start": start,
+            "end": start + len(results),
+            "total": self.total,
+            "results": results,
+        }
+
+
+class JobQueue:
+    """Runs result generators on a local worker pool so request handlers return at once.
+
+    Each job consumes an iterator (one item per simulation step) and stores the
+    items as they arrive; cancellation is checked between items. At most
+    ``max_jobs`` jobs are remembered, the oldest finished ones are dropped first.
+    """
+
+    def __init__(self, max_workers=2, max_jobs=100):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+
+    def submit(self, make_results, total=None):
+        with self.lock:
+            job = Job(str(next(self.ids)), total)
+            self.jobs[job.id] = job
+            self._evict()
+        self.executor.submit(self._run, job, make_results)
+        return job
+
+    def _evict(self):
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.is_done()]:
+            if len(self.jobs) <= self.max_jobs:
+                break
+            del self.jobs[job_id]
+
+    def _run(self, job, make_results):
+        if job.cancel_event.is_set():
+            return
+        job.status = "running"
+        try:
+            for item in make_results():
+                if job.cancel_event.is_set():
+                    break
+                job.results.append(item)
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        else:
+            job.status = "cancelled" if job.cancel_event.is_set() else "done"
+        job.finished = time.time()
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished = time.time()
+        return job
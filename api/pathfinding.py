@@ -0,0 +1,237 @@
+import heapq
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Same neighbor order as the original find_path
+DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+# Static paths kept by find_path_cached, least recently used dropped first
+PATH_CACHE_SIZE = 4096
+
+
+def remove_loops(path):
+    # Detours can cross the rest of the path; cut out everything between two visits to a cell
+    index = {}
+    simple = []
+    for pos in path:
+        i = index.get(pos)
+        if i is None:
+            index[pos] = len(simple)
+            simple.append(pos)
+            continue
+        for dropped in simple[i + 1:]:
+            del index[dropped]
+        del simple[i + 1:]
+    return simple
+
+
+class GridPathfinder:
+    """A* over a square grid with a walkable mask and a tractor occupancy index.
+
+    Cells are addressed internally by the flat index ``x * size + y`` so heap
+    ordering matches the ``(priority, (x, y))`` tuples the old implementation
+    sorted on, and ties resolve to the same path. ``neighbors`` is a flat
+    ``array('i')`` with four slots per cell, ``neighbors[4 * cell + k]`` being
+    the walkable cell in direction ``DIRECTIONS[k]`` or -1, so the table costs
+    16 bytes per cell however large the grid gets.
+
+    With ``log_changes`` every occupancy change is also appended to
+    ``changes`` so incremental planners (see ``dstar.DStarLite``) can catch up
+    on the cells that changed since they last looked; ``changes[i]`` is change
+    number ``changes_base + i``.
+    """
+
+    def __init__(self, grid_size, walkable=None, path_cache_size=PATH_CACHE_SIZE, log_changes=False):
+        self.size = grid_size
+        if walkable is None:
+            walkable = np.ones((grid_size, grid_size), dtype=bool)
+        # walkable[x, y] marks cells tractors may drive over
+        self.walkable = walkable
+        self.neighbors = self._build_neighbors()
+        # Number of tractors on each cell
+        self.occupancy = bytearray(grid_size * grid_size)
+        self.empty = bytes(grid_size * grid_size)
+        self.expanded = 0
+        self.log_changes = log_changes
+        self.changes = []
+        self.changes_base = 0
+        # (start cell, end cell) -> shortest path ignoring tractors; the walkable grid never changes
+        self.path_cache = OrderedDict()
+        self.path_cache_size = path_cache_size
+        self.cache_hits = 0
+        self.repairs = 0
+
+    def _build_neighbors(self):
+        size = self.size
+        walkable = np.asarray(self.walkable, dtype=bool)
+        cells = np.arange(size * size, dtype=np.int32).reshape(size, size)
+        table = np.full((size, size, len(DIRECTIONS)), -1, dtype=np.int32)
+        for k, (dx, dy) in enumerate(DIRECTIONS):
+            # Cells whose neighbor in this direction is inside the grid, and those neighbors
+            xs, nxs = slice(max(0, -dx), size - max(0, dx)), slice(max(0, dx), size - max(0, -dx))
+            ys, nys = slice(max(0, -dy), size - max(0, dy)), slice(max(0, dy), size - max(0, -dy))
+            table[xs, ys, k] = np.where(walkable[nxs, nys], cells[nxs, nys], -1)
+        table[~walkable] = -1
+        neighbors = array('i')
+        neighbors.frombytes(table.astype(np.intc).tobytes())
+        return neighbors
+
+    def neighbors_of(self, cell):
+        # Walkable neighbors of a cell, in DIRECTIONS order
+        base = cell * 4
+        return [next_cell for next_cell in self.neighbors[base:base + 4] if next_cell >= 0]
+
+    def index(self, pos):
+        return pos[0] * self.size + pos[1]
+
+    def position(self, cell):
+        return divmod(cell, self.size)
+
+    def rebuild_occupancy(self, positions):
+        occupancy = bytearray(self.size * self.size)
+        for pos in positions:
+            occupancy[self.index(pos)] += 1
+        self.occupancy = occupancy
+        # Skip past every logged change so incremental planners start over
+        self.changes_base += len(self.changes) + 1
+        self.changes = []
+
+    def move(self, old_pos, new_pos):
+        old_cell = self.index(old_pos)
+        new_cell = self.index(new_pos)
+        self.occupancy[old_cell] -= 1
+        self.occupancy[new_cell] += 1
+        if not self.log_changes:
+            return
+        changes = self.changes
+        changes.append(old_cell)
+        changes.append(new_cell)
+        if len(changes) > 4 * len(self.occupancy):
+            # Planners that fell this far behind start over instead
+            half = len(changes) // 2
+            del changes[:half]
+            self.changes_base += half
+
+    def is_occupied(self, pos):
+        return self.occupancy[self.index(pos)] > 0
+
+    def find_path(self, start, end, occupancy=None, max_expanded=None):
+        """Shortest path from ``start`` to ``end`` around occupied cells, or None.
+
+        ``occupancy`` replaces the tractor index (``self.empty`` ignores
+        tractors), and the search gives up after ``max_expanded`` cells.
+        """
+        if start == end:
+            return [start]
+
+        size = self.size
+        neighbors = self.neighbors
+        if occupancy is None:
+            occupancy = self.occupancy
+        limit = float('inf') if max_expanded is None else max_expanded
+        expanded = 0
+        start_cell = self.index(start)
+        end_cell = self.index(end)
+        end_x, end_y = end
+
+        came_from = {start_cell: None}
+        cost_so_far = {start_cell: 0}
+        closed = set()
+        frontier = [(abs(start[0] - end_x) + abs(start[1] - end_y), start_cell)]
+
+        while frontier:
+            _, current = heapq.heappop(frontier)
+            if current == end_cell:
+                break
+            if current in closed:
+                continue
+            closed.add(current)
+            expanded += 1
+            if expanded > limit:
+                break
+
+            new_cost = cost_so_far[current] + 1
+            base = current * 4
+            for next_cell in neighbors[base:base + 4]:
+                # The start cell holds the tractor asking for the path
+                if next_cell < 0 or (occupancy[next_cell] and next_cell != start_cell):
+                    continue
+                if next_cell in closed:
+                    continue
+                old_cost = cost_so_far.get(next_cell)
+                if old_cost is None or new_cost < old_cost:
+                    cost_so_far[next_cell] = new_cost
+                    came_from[next_cell] = current
+                    nx, ny = divmod(next_cell, size)
+                    priority = new_cost + abs(nx - end_x) + abs(ny - end_y)
+                    heapq.heappush(frontier, (priority, next_cell))
+
+        self.expanded += expanded
+        if end_cell not in came_from or expanded > limit:
+            return None
+
+        path = []
+        current = end_cell
+        while current is not None:
+            path.append(divmod(current, size))
+            current = came_from[current]
+        return path[::-1]
+
+    def static_path(self, start, end):
+        # Shortest path ignoring tractors, computed once per (start, end)
+        key = (self.index(start), self.index(end))
+        path = self.path_cache.get(key)
+        if path is not None:
+            self.path_cache.move_to_end(key)
+            self.cache_hits += 1
+            return path
+        path = self.find_path(start, end, occupancy=self.empty)
+        if path is None:
+            return None
+        path = tuple(path)
+        self.path_cache[key] = path
+        if len(self.path_cache) > self.path_cache_size:
+            self.path_cache.popitem(last=False)
+        return path
+
+    def repair(self, path):
+        """Reroutes ``path`` around the cells tractors now occupy.
+
+        Each run of occupied cells is replaced by a detour between the free
+        cells on either side of it, searched only near the run; when no short
+        detour exists the whole path is planned again. ``path[0]`` is the
+        cell of the tractor following it. Returns None if the last cell is
+        occupied or nothing gets through.
+        """
+        occupancy = self.occupancy
+        size = self.size
+        path = list(path)
+        i = 1
+        while i < len(path):
+            if not occupancy[path[i][0] * size + path[i][1]]:
+                i += 1
+                continue
+            j = i + 1
+            while j < len(path) and occupancy[path[j][0] * size + path[j][1]]:
+                j += 1
+            if j == len(path):
+                return None
+            self.repairs += 1
+            blocked = j - i
+            detour = self.find_path(path[i - 1], path[j], max_expanded=16 * (blocked + 2) ** 2)
+            if detour is None:
+                return self.find_path(path[0], path[-1])
+            path[i - 1:j + 1] = detour
+            i += len(detour) - 2
+        return remove_loops(path)
+
+    def find_path_cached(self, start, end):
+        # Cached static path, repaired around tractors in the way
+        if start == end:
+            return [start]
+        path = self.static_path(start, end)
+        if path is None:
+            return None
+        return self.repair(path)
@@ -0,0 +1,79 @@
+import numpy as np
+
+from targets import TargetIndex
+
+
+MAX_MATURITY = 5
+
+
+class PlantField:
+    """Structure-of-arrays state for the square plant field.
+
+    ``maturity``, ``watered`` and ``harvested`` are indexed by
+    ``[x - origin, y - origin]``. Growth is a single vectorized update, and the
+    watering/harvest target indexes double as the "any plant needs water" and
+    "any plant ready" counters.
+    """
+
+    def __init__(self, origin, size):
+        self.origin = origin
+        self.size = size
+        self.maturity = np.zeros((size, size), dtype=np.uint8)
+        self.watered = np.zeros((size, size), dtype=bool)
+        self.harvested = np.zeros((size, size), dtype=bool)
+        # Watered plants still below MAX_MATURITY
+        self.growing = 0
+        self.harvested_count = 0
+        self.water_targets = TargetIndex.from_block(origin, origin + size, origin, origin + size)
+        self.harvest_targets = TargetIndex()
+
+    def __len__(self):
+        return self.size * self.size
+
+    def __contains__(self, pos):
+        return (self.origin <= pos[0] < self.origin + self.size and
+                self.origin <= pos[1] < self.origin + self.size)
+
+    def _cell(self, pos):
+        return pos[0] - self.origin, pos[1] - self.origin
+
+    @property
+    def needs_water_count(self):
+        return len(self.water_targets)
+
+    @property
+    def ready_count(self):
+        return len(self.harvest_targets)
+
+    def needs_water(self, pos):
+        cell = self._cell(pos)
+        return (not self.watered[cell] and not self.harvested[cell] and
+                self.maturity[cell] < MAX_MATURITY)
+
+    def is_ready_for_harvest(self, pos):
+        cell = self._cell(pos)
+        return self.maturity[cell] >= MAX_MATURITY and not self.harvested[cell]
+
+    def grow(self):
+        if not self.growing:
+            return
+        mask = self.watered & ~self.harvested & (self.maturity < MAX_MATURITY)
+        self.maturity += mask
+        ready_x, ready_y = np.nonzero(mask & (self.maturity >= MAX_MATURITY))
+        self.growing -= len(ready_x)
+        for x, y in zip((ready_x + self.origin).tolist(), (ready_y + self.origin).tolist()):
+            self.harvest_targets.add((x, y))
+
+    def water(self, pos):
+        cell = self._cell(pos)
+        if self.needs_water(pos):
+            self.growing += 1
+        self.watered[cell] = True
+        self.water_targets.discard(pos)
+
+    def harvest(self, pos):
+        cell = self._cell(pos)
+        if not self.harvested[cell]:
+            self.harvested_count += 1
+        self.harvested[cell] = True
+        self.harvest_targets.discard(pos)
@@ -0,0 +1,171 @@
+import gzip
+import json
+import os
+import struct
+
+import numpy as np
+
+
+def dumps_line(record):
+    # Compact JSON, one record per line
+    return json.dumps(record, separators=(',', ':')) + '\n'
+
+
+class NDJSONWriter:
+    """Writes one compact JSON line per simulation step as it is produced.
+
+    Paths ending in ``.gz`` (or ``compress=True``) are written through gzip.
+    """
+
+    def __init__(self, path, compress=None):
+        if compress is None:
+            compress = path.endswith('.gz')
+        self.path = path
+        if compress:
+            self.file = gzip.open(path, 'wt', encoding='utf-8')
+        else:
+            self.file = open(path, 'w', encoding='utf-8')
+
+    def write(self, record):
+        self.file.write(dumps_line(record))
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_ndjson(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+# Binary trajectory format: magic, uint32 header length, JSON header padded to
+# 8 bytes, then one fixed-width record per tractor per step, step-major.
+MAGIC = b'FARMTRJ1'
+TASKS = ("idle", "watering", "harvesting", "depositing")
+TRACTOR_DTYPE = np.dtype([
+    ('x', '<i4'),
+    ('y', '<i4'),
+    ('task', 'u1'),
+    ('water_level', '<i4'),
+    ('fuel_level', '<i4'),
+    ('wheat_level', '<i4'),
+])
+
+
+class BinaryTrajectoryWriter:
+    """Appends each step as a NumPy record array with small integer task codes.
+
+    The header (parameters, task-name table, tractor count) is written with
+    the first step, since the tractor count is only known then.
+    """
+
+    def __init__(self, path, params=None):
+        self.path = path
+        self.params = dict(params or {})
+        self.task_codes = {name: code for code, name in enumerate(TASKS)}
+        self.num_tractors = None
+        self.file = open(path, 'wb')
+
+    def _write_header(self, num_tractors):
+        self.num_tractors = num_tractors
+        header = json.dumps({
+            "params": self.params,
+            "tasks": list(TASKS),
+            "num_tractors": num_tractors,
+            "dtype": TRACTOR_DTYPE.descr,
+        }).encode('utf-8')
+        header += b' ' * (-(len(MAGIC) + 4 + len(header)) % 8)
+        self.file.write(MAGIC)
+        self.file.write(struct.pack('<I', len(header)))
+        self.file.write(header)
+
+    def write(self, record):
+        tractors = record["tractors"]
+        if self.num_tractors is None:
+            self._write_header(len(tractors))
+        rows = np.empty(len(tractors), dtype=TRACTOR_DTYPE)
+        for i, tractor in enumerate(tractors):
+            rows[i] = (
+                tractor["position"][0],
+                tractor["position"][1],
+                self.task_codes[tractor["task"]],
+                tractor["water_level"],
+                tractor["fuel_level"],
+                tractor["wheat_level"],
+            )
+        self.file.write(rows.tobytes())
+
+    def close(self):
+        if self.num_tractors is None:
+            self._write_header(0)
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TrajectoryReader:
+    """Memory-mapped reader for files written by BinaryTrajectoryWriter.
+
+    ``records[step, tractor]`` is backed by the file, so reading one step or one
+    tractor's trajectory only touches those pages.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a trajectory file")
+            (header_length,) = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(header_length))
+        self.params = header["params"]
+        self.tasks = header["tasks"]
+        self.num_tractors = header["num_tractors"]
+        dtype = np.dtype([tuple(field) for field in header["dtype"]])
+        offset = len(MAGIC) + 4 + header_length
+        record_size = dtype.itemsize * max(self.num_tractors, 1)
+        steps = (os.path.getsize(path) - offset) // record_size if self.num_tractors else 0
+        if steps:
+            self.records = np.memmap(path, dtype=dtype, mode='r', offset=offset,
+                                     shape=(steps, self.num_tractors))
+        else:
+            self.records = np.empty((0, self.num_tractors), dtype=dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def step(self, n):
+        return self.records[n]
+
+    def tractor(self, k):
+        return self.records[:, k]
+
+    def step_dict(self, n):
+        # Same shape as the NDJSON / JSON step records
+        return {"step": n, "tractors": [
+            {
+                "position": [int(row['x']), int(row['y'])],
+                "task": self.tasks[row['task']],
+                "water_level": int(row['water_level']),
+                "fuel_level": int(row['fuel_level']),
+                "wheat_level": int(row['wheat_level']),
+            }
+            for row in self.records[n]
+        ]}
+
+
+def open_writer(path, params=None):
+    if path.endswith('.traj'):
+        return BinaryTrajectoryWriter(path, params)
+    return NDJSONWriter(path)
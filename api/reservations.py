@@ -0,0 +1,174 @@
+import heapq
+
+
+# Steps a stuck tractor gets to move aside before a tractor it yields to arrives
+YIELD_DELAY = 3
+
+
+class ReservationTable:
+    """Windowed cooperative A* (WHCA*) over a GridPathfinder's grid.
+
+    Tractors plan one after another in space-time against the cells the
+    others have reserved: ``reserved[(cell, t)]`` holds the owner of each
+    planned cell, and every tractor is also parked on the last cell of its plan
+    (or where it stands) from the moment it gets there until it plans again.
+    A search covers at most ``window`` steps; waiting in place is a move, and a
+    plan may only end on a cell nobody else needs later, so the next plan can
+    always start by waiting. Entering a cell the step after another tractor
+    leaves it, or leaving one the step before another enters it, is not
+    allowed: that rules out head-on swaps and keeps the plans valid when
+    tractors move one at a time within a step.
+
+    A tractor that is only waiting (``yielding``: its plan never moves, or it
+    was parked while able to move) does not wall others in: later plans may go
+    through its cell from ``YIELD_DELAY`` steps on, and the tractor is added to
+    ``bumped`` so the caller makes it plan again and move aside.
+    """
+
+    def __init__(self, pathfinder, window=8):
+        self.pathfinder = pathfinder
+        self.window = window
+        self.reserved = {}      # (cell, t) -> owner
+        self.owned = {}         # owner -> reserved keys
+        self.parked = {}        # cell -> (owner, since)
+        self.parked_at = {}     # owner -> cell
+        self.yielding = set()
+        self.bumped = set()
+        self.horizon = 0        # latest reserved time
+        self.expanded = 0
+
+    def release(self, owner):
+        # Tractors it yielded to, or stranded by a broken plan, may have taken over its cells
+        for key in self.owned.pop(owner, ()):
+            if self.reserved.get(key) == owner:
+                del self.reserved[key]
+        cell = self.parked_at.pop(owner, None)
+        if cell is not None and self.parked.get(cell, (None,))[0] == owner:
+            del self.parked[cell]
+        self.yielding.discard(owner)
+
+    def park(self, owner, pos, now, can_yield=True):
+        # can_yield=False for tractors that cannot move, such as those out of fuel
+        cell = self.pathfinder.index(pos)
+        if self.parked_at.get(owner) != cell or self.owned.get(owner):
+            self.release(owner)
+            self.parked[cell] = (owner, now)
+            self.parked_at[owner] = cell
+        if can_yield:
+            self.yielding.add(owner)
+        else:
+            self.yielding.discard(owner)
+
+    def parked_on(self, pos):
+        parked = self.parked.get(self.pathfinder.index(pos))
+        return parked[0] if parked is not None else None
+
+    def blocker(self, owner, cell, t, yield_from, parked=True):
+        """Tractor that keeps ``owner`` off ``cell`` at time ``t``, or None.
+
+        Yielding tractors only block before ``yield_from``.
+        """
+        other = self.reserved.get((cell, t))
+        if (other is None or other == owner) and parked:
+            other = None
+            parked = self.parked.get(cell)
+            if parked is not None and parked[0] != owner and parked[1] <= t:
+                other = parked[0]
+        if other is None or other == owner or (other in self.yielding and t >= yield_from):
+            return None
+        return other
+
+    def can_park(self, owner, cell, t):
+        # Nobody else may be parked on the cell or pass through it from t on
+        parked = self.parked.get(cell)
+        if parked is not None and parked[0] != owner:
+            return False
+        for later in range(t, self.horizon + 1):
+            other = self.reserved.get((cell, later))
+            if other is not None and other != owner:
+                return False
+        return True
+
+    def plan(self, owner, start, goal, now):
+        """Positions for steps now + 1, now + 2, ... towards ``goal``, reserved for ``owner``.
+
+        The plan ends at the goal or after ``window`` steps, whichever comes
+        first; while another tractor is parked on the goal the plan only gets
+        as close as two cells from it. With ``goal=None`` the tractor has
+        nowhere to go: it waits for ``window`` steps, or moves to the nearest
+        cell nobody else needs. Returns None, leaving the tractor parked at
+        ``start``, when no plan is possible.
+        """
+        self.release(owner)
+        size = self.pathfinder.size
+        neighbors_of = self.pathfinder.neighbors_of
+        window = self.window
+        yield_from = now + YIELD_DELAY
+        start_cell = self.pathfinder.index(start)
+        if goal is None:
+            # Zero heuristic, ties broken by distance from the start: stay put if nobody needs the cell
+            goal_cell, (goal_x, goal_y), weight = None, start, 0
+            min_distance = 0
+        else:
+            goal_cell = self.pathfinder.index(goal)
+            (goal_x, goal_y), weight = goal, 1
+            # While someone is parked on the goal, wait two cells away so they can still get out
+            parked = self.parked.get(goal_cell)
+            min_distance = 2 if parked is not None and parked[0] != owner else 0
+
+        # Every step, moving or waiting, costs 1, so a state's cost is its depth
+        depth_keys = window + 1
+        start_h = abs(start[0] - goal_x) + abs(start[1] - goal_y)
+        came_from = {start_cell * depth_keys: None}
+        frontier = [(start_h * weight, start_h, 0, start_cell)]
+        found = None
+        while frontier:
+            _, h, depth, cell = heapq.heappop(frontier)
+            if (depth and (cell == goal_cell or depth == window) and h >= min_distance
+                    and self.can_park(owner, cell, now + depth)):
+                found = cell * depth_keys + depth
+                break
+            if depth == window:
+                continue
+            self.expanded += 1
+            t = now + depth
+            for next_cell in neighbors_of(cell) + [cell]:
+                key = next_cell * depth_keys + depth + 1
+                if key in came_from:
+                    continue
+                if next_cell != cell and self.blocker(owner, next_cell, t, yield_from) is not None:
+                    continue
+                if self.blocker(owner, next_cell, t + 1, yield_from) is not None:
+                    continue
+                if self.blocker(owner, next_cell, t + 2, yield_from, parked=False) is not None:
+                    continue
+                came_from[key] = cell * depth_keys + depth
+                nx, ny = divmod(next_cell, size)
+                h = abs(nx - goal_x) + abs(ny - goal_y)
+                heapq.heappush(frontier, (depth + 1 + h * weight, h, depth + 1, next_cell))
+
+        if found is None:
+            self.park(owner, start, now)
+            return None
+
+        cells = []
+        key = found
+        while key is not None:
+            cells.append(key // depth_keys)
+            key = came_from[key]
+        cells.reverse()
+        keys = [(cell, now + depth) for depth, cell in enumerate(cells)]
+        for cell, t in keys:
+            # Yielding tractors in the way have to move aside
+            for moment in (t - 1, t, t + 1):
+                other = self.blocker(owner, cell, moment, moment + 1)
+                if other is not None:
+                    self.bumped.add(other)
+            self.reserved[(cell, t)] = owner
+        self.owned[owner] = keys
+        self.horizon = max(self.horizon, now + len(cells) - 1)
+        self.parked[cells[-1]] = (owner, now + len(cells) - 1)
+        self.parked_at[owner] = cells[-1]
+        if start_cell != goal_cell and all(cell == start_cell for cell in cells):
+            self.yielding.add(owner)
+        return [divmod(cell, size) for cell in cells[1:]]
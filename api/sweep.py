@@ -0,0 +1,103 @@
+import argparse
+import itertools
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from farmmodel import FarmModel
+from recording import NDJSONWriter
+
+
+DEFAULT_PARAMETERS = {
+    'plant_grid_size': 5,
+    'path_width': 2,
+    'num_tractors': 3,
+    'water_capacity': 10,
+    'fuel_capacity': 20,
+    'wheat_capacity': 5,
+    'steps': 50,
+}
+
+
+def expand_grid(grid):
+    # {"num_tractors": [2, 4], "fuel_capacity": [20, 40]} -> one dict per combination
+    keys = sorted(grid)
+    values = [grid[key] if isinstance(grid[key], (list, tuple)) else [grid[key]] for key in keys]
+    return [dict(zip(keys, combination)) for combination in itertools.product(*values)]
+
+
+def run_one(params, seed):
+    params = {**DEFAULT_PARAMETERS, **params, 'seed': seed}
+    start_time = time.perf_counter()
+    summary = {"params": params, "seed": seed}
+
+    steps_run = 0
+    steps_to_finish = None
+    model = FarmModel(params)
+    model.initialize()
+    try:
+        while steps_run < params['steps']:
+            model.step()
+            steps_run += 1
+            if model.is_finished():
+                steps_to_finish = steps_run
+                break
+            if all(t.fuel_level <= 0 for t in model.tractors):
+                break
+    except Exception as e:
+        summary["error"] = str(e)
+
+    summary.update({
+        "steps": steps_run,
+        "steps_to_finish": steps_to_finish,
+        "wheat_delivered": model.wheat_delivered,
+        "fuel_used": model.fuel_used(),
+        "runtime": time.perf_counter() - start_time,
+    })
+    return summary
+
+
+def _run_job(job):
+    return run_one(*job)
+
+
+def run_sweep(grid, seeds, workers=None):
+    """Runs every parameter combination in ``grid`` for every seed on a process pool.
+
+    Results come back in job order (combinations, then seeds) as summary dicts.
+    """
+    jobs = [(params, seed) for params in expand_grid(grid) for seed in seeds]
+    if workers == 1:
+        return [_run_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_job, jobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run FarmModel over a parameter grid and seed list")
+    parser.add_argument('--grid', default='{}',
+                        help='JSON object mapping parameter names to lists of values')
+    parser.add_argument('--grid-file', help='JSON file with the parameter grid')
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0])
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--output', default='sweep_results.ndjson')
+    args = parser.parse_args()
+
+    if args.grid_file:
+        with open(args.grid_file) as f:
+            grid = json.load(f)
+    else:
+        grid = json.loads(args.grid)
+
+    start_time = time.perf_counter()
+    results = run_sweep(grid, args.seeds, args.workers)
+    elapsed = time.perf_counter() - start_time
+
+    with NDJSONWriter(args.output) as writer:
+        for result in results:
+            writer.write(result)
+    print(f"{len(results)} runs in {elapsed:.2f} s, results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
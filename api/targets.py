@@ -0,0 +1,128 @@
+import bisect
+
+
+class TargetIndex:
+    """Pending target cells bucketed by row, with per-tractor claims.
+
+    Nearest-target queries walk the non-empty rows outward from the tractor and
+    bisect each row for the closest column, stopping once the row distance alone
+    exceeds the best Manhattan distance found. Claimed cells are taken out of
+    the buckets so other tractors are not sent to them.
+    """
+
+    def __init__(self, positions=()):
+        self.rows = {}        # y -> sorted list of x
+        self.row_keys = []    # sorted y of non-empty rows
+        self.claims = {}      # position -> owner
+        self.claimed_by = {}  # owner -> position
+        self.count = 0        # cells in the buckets
+        for pos in positions:
+            self.add(pos)
+
+    @classmethod
+    def from_block(cls, x0, x1, y0, y1):
+        # Bulk build for a full rectangle; rows share the column int objects
+        index = cls()
+        xs = list(range(x0, x1))
+        if xs:
+            index.rows = {y: list(xs) for y in range(y0, y1)}
+            index.row_keys = list(range(y0, y1))
+            index.count = len(xs) * len(index.row_keys)
+        return index
+
+    def __len__(self):
+        return self.count + len(self.claims)
+
+    def __contains__(self, pos):
+        return pos in self.claims or self._in_bucket(pos)
+
+    def _in_bucket(self, pos):
+        xs = self.rows.get(pos[1])
+        if not xs:
+            return False
+        i = bisect.bisect_left(xs, pos[0])
+        return i < len(xs) and xs[i] == pos[0]
+
+    def _insert(self, pos):
+        x, y = pos
+        xs = self.rows.get(y)
+        if xs is None:
+            xs = self.rows[y] = []
+            bisect.insort(self.row_keys, y)
+        i = bisect.bisect_left(xs, x)
+        if i == len(xs) or xs[i] != x:
+            xs.insert(i, x)
+            self.count += 1
+
+    def _remove(self, pos):
+        x, y = pos
+        xs = self.rows.get(y)
+        if not xs:
+            return False
+        i = bisect.bisect_left(xs, x)
+        if i == len(xs) or xs[i] != x:
+            return False
+        del xs[i]
+        self.count -= 1
+        if not xs:
+            del self.rows[y]
+            del self.row_keys[bisect.bisect_left(self.row_keys, y)]
+        return True
+
+    def add(self, pos):
+        if pos not in self.claims:
+            self._insert(pos)
+
+    def discard(self, pos):
+        owner = self.claims.pop(pos, None)
+        if owner is not None:
+            del self.claimed_by[owner]
+        else:
+            self._remove(pos)
+
+    def claim(self, pos, owner):
+        self.release(owner)
+        if self._remove(pos):
+            self.claims[pos] = owner
+            self.claimed_by[owner] = pos
+            return True
+        return False
+
+    def release(self, owner):
+        pos = self.claimed_by.pop(owner, None)
+        if pos is not None:
+            del self.claims[pos]
+            self._insert(pos)
+
+    def _nearest_in_row(self, y, x0, dy, best):
+        xs = self.rows[y]
+        i = bisect.bisect_left(xs, x0)
+        for j in (i - 1, i):
+            if 0 <= j < len(xs):
+                key = (dy + abs(xs[j] - x0), y, xs[j])
+                if best is None or key < best:
+                    best = key
+        return best
+
+    def nearest(self, pos):
+        # Ties are broken by (y, x), the order plants are created in
+        x0, y0 = pos
+        keys = self.row_keys
+        hi = bisect.bisect_left(keys, y0)
+        lo = hi - 1
+        best = None
+        while lo >= 0 or hi < len(keys):
+            dy_lo = y0 - keys[lo] if lo >= 0 else None
+            dy_hi = keys[hi] - y0 if hi < len(keys) else None
+            if dy_hi is None or (dy_lo is not None and dy_lo <= dy_hi):
+                y, dy = keys[lo], dy_lo
+                lo -= 1
+            else:
+                y, dy = keys[hi], dy_hi
+                hi += 1
+            if best is not None and dy > best[0]:
+                break
+            best = self._nearest_in_row(y, x0, dy, best)
+        if best is None:
+            return None
+        return (best[2], best[1])
@@ -0,0 +1,89 @@
+"""
+Árbol de RRT* almacenado en arreglos de NumPy
+
+TC2008B
+Grupo: 303
+Equipo: 1
+"""
+
+import numpy as np
+
+
+class Arbol:
+    """
+    Árbol dirigido de RRT* guardado como estructura de arreglos.
+
+    Cada nodo es un índice en los arreglos preasignados `x`, `y`, `padre` y `costo`, que duplican su
+    capacidad cuando se llenan. `hijos` permite propagar a todos los descendientes el cambio de costo
+    cuando un nodo se reconecta a un nuevo padre.
+    """
+
+    def __init__(self, x, y, capacidad=1024):
+        self.x = np.empty(capacidad)
+        self.y = np.empty(capacidad)
+        self.padre = np.full(capacidad, -1, dtype=np.int64)
+        self.costo = np.empty(capacidad)
+        self.hijos = []
+        self.n = 0
+        self.agregar(x, y, -1, 0.0)
+
+    def __len__(self):
+        return self.n
+
+    def _crecer(self):
+        capacidad = 2 * len(self.x)
+        for nombre in ('x', 'y', 'costo'):
+            arreglo = np.empty(capacidad)
+            arreglo[:self.n] = getattr(self, nombre)[:self.n]
+            setattr(self, nombre, arreglo)
+        padre = np.full(capacidad, -1, dtype=np.int64)
+        padre[:self.n] = self.padre[:self.n]
+        self.padre = padre
+
+    def agregar(self, x, y, padre, costo):
+        """Agrega un nodo y regresa su índice."""
+        if self.n == len(self.x):
+            self._crecer()
+        i = self.n
+        self.x[i] = x
+        self.y[i] = y
+        self.padre[i] = padre
+        self.costo[i] = costo
+        self.hijos.append([])
+        if padre >= 0:
+            self.hijos[padre].append(i)
+        self.n += 1
+        return i
+
+    def punto(self, i):
+        return (float(self.x[i]), float(self.y[i]))
+
+    def distancias(self, indices, x, y):
+        """Distancias vectorizadas desde (x, y) hacia los nodos `indices`."""
+        return np.hypot(self.x[indices] - x, self.y[indices] - y)
+
+    def cambiar_padre(self, i, nuevo_padre, nuevo_costo):
+        """Reconecta el nodo `i` y actualiza el costo de todo su subárbol."""
+        anterior = int(self.padre[i])
+        if anterior >= 0:
+            self.hijos[anterior].remove(i)
+        self.hijos[nuevo_padre].append(i)
+        self.padre[i] = nuevo_padre
+        delta = nuevo_costo - self.costo[i]
+        self.costo[i] = nuevo_costo
+        pendientes = list(self.hijos[i])
+        while pendientes:
+            nodo = pendientes.pop()
+            self.costo[nodo] += delta
+            pendientes.extend(self.hijos[nodo])
+
+    def ruta(self, i):
+        """Ruta desde la raíz hasta el nodo `i` como lista de tuplas (x, y)."""
+        ruta = []
+        while i >= 0:
+            ruta.append(self.punto(i))
+            i = int(self.padre[i])
+        return ruta[::-1]
+
+    def memoria(self):
+        return self.x.nbytes + self.y.nbytes + self.padre.nbytes + self.costo.nbytes
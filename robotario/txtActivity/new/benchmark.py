@@ -0,0 +1,238 @@
+"""
+Benchmark del planificador RRT*
+
+TC2008B
+Grupo: 303
+Equipo: 1
+"""
+
+import argparse
+import json
+import math
+import random
+import time
+
+import numpy as np
+from shapely.geometry import Point, Polygon
+
+from main import (
+    ALTO_ESPACIO,
+    ALTO_ROBOT_EFECTIVO,
+    ANCHO_ESPACIO,
+    ANCHO_ROBOT_EFECTIVO,
+    MARGEN,
+    RRTStar,
+    limites_mapa,
+    load_paths_from_directory,
+    parse_initial_positions,
+    parse_obstacles,
+    parse_target_positions,
+    segmentos_robots,
+    semilla_segmento,
+)
+
+CONTADORES = ('pruebas_punto', 'pruebas_arista', 'pruebas_geometria', 'pruebas_campo')
+
+
+class RRTStarLineal(RRTStar):
+    """RRT* que recorre todos los nodos del árbol en cada consulta, como referencia sin índice espacial."""
+
+    def obtener_nodo_mas_cercano(self, punto_aleatorio):
+        distancias = [self.calcular_distancia(self.arbol.punto(i), punto_aleatorio) for i in range(len(self.arbol))]
+        return distancias.index(min(distancias))
+
+    def encontrar_vecinos(self, nuevo_punto):
+        todos = np.arange(len(self.arbol))
+        distancias = self.arbol.distancias(todos, nuevo_punto[0], nuevo_punto[1])
+        dentro = distancias <= self.radio_vecinos()
+        return todos[dentro], distancias[dentro]
+
+
+def medir(clase, inicio, objetivo, obstaculos, iteraciones, semilla, al_mejorar=None, **opciones):
+    random.seed(semilla)
+    rrt_star = clase(
+        inicio=inicio,
+        objetivo=objetivo,
+        obstaculos=obstaculos,
+        tamano_mapa=(ANCHO_ESPACIO, ALTO_ESPACIO),
+        tamano_paso=0.5,
+        max_iter=iteraciones,
+        objetivo_bias=0.2,
+        **{'max_iter_sin_mejora': iteraciones, **opciones}  # Por omisión sin terminación temprana
+    )
+    tiempo_inicio = time.perf_counter()
+    rrt_star.planificar(al_mejorar=al_mejorar)
+    return time.perf_counter() - tiempo_inicio, rrt_star
+
+
+def longitud_ruta(ruta):
+    return sum(math.hypot(x2 - x1, y2 - y1) for (x1, y1), (x2, y2) in zip(ruta, ruta[1:])) if ruta else float('inf')
+
+
+def comparar_indice(iteraciones, semilla):
+    """Compara iteraciones por segundo de la búsqueda lineal contra el índice espacial."""
+    posiciones_iniciales = parse_initial_positions('input/InitialPositions.txt')
+    posiciones_objetivo = parse_target_positions('input/TargetPositions.txt')
+    obstaculos = parse_obstacles('input')
+    inicio, objetivo = posiciones_iniciales[0], posiciones_objetivo[0]
+
+    print(f"{'iteraciones':>11} {'lineal it/s':>12} {'índice it/s':>12} {'aceleración':>12} {'nodos':>7} {'memoria':>9}")
+    for n in iteraciones:
+        # Mismo muestreo en ambos para que las rutas sean comparables
+        tiempo_lineal, lineal = medir(RRTStarLineal, inicio, objetivo, obstaculos, n, semilla, muestreo_informado=False)
+        tiempo_indice, indice = medir(RRTStar, inicio, objetivo, obstaculos, n, semilla, muestreo_informado=False)
+        if lineal.ruta != indice.ruta:
+            raise AssertionError("El índice espacial cambió la ruta obtenida")
+        print(f"{n:>11} {n / tiempo_lineal:>12.0f} {n / tiempo_indice:>12.0f} "
+              f"{tiempo_lineal / tiempo_indice:>11.1f}x {len(indice.arbol):>7} {indice.arbol.memoria() / 1024:>7.0f}KB")
+
+
+def comparar_informado(iteraciones, semillas):
+    """Costo de la mejor ruta contra iteraciones, con muestreo uniforme e informado, promediando sobre semillas."""
+    posiciones_iniciales = parse_initial_positions('input/InitialPositions.txt')
+    posiciones_objetivo = parse_target_positions('input/TargetPositions.txt')
+    obstaculos = parse_obstacles('input')
+    inicio, objetivo = posiciones_iniciales[0], posiciones_objetivo[0]
+    max_iteraciones = max(iteraciones)
+
+    costos = {}  # (informado, iteraciones) -> costos por semilla
+    suavizadas = {False: [], True: []}
+    for informado in (False, True):
+        for semilla in semillas:
+            mejoras = []
+            _, rrt_star = medir(RRTStar, inicio, objetivo, obstaculos, max_iteraciones, semilla,
+                                al_mejorar=lambda costo, ruta, iteracion, segundos: mejoras.append((iteracion, costo)),
+                                muestreo_informado=informado)
+            for n in iteraciones:
+                alcanzados = [costo for iteracion, costo in mejoras if iteracion <= n]
+                costos.setdefault((informado, n), []).append(min(alcanzados) if alcanzados else float('inf'))
+            suavizadas[informado].append(longitud_ruta(rrt_star.ruta))
+
+    print(f"{'iteraciones':>11} {'uniforme':>10} {'informado':>10}")
+    for n in iteraciones:
+        print(f"{n:>11} {np.mean(costos[(False, n)]):>10.3f} {np.mean(costos[(True, n)]):>10.3f}")
+    print(f"{'suavizada':>11} {np.mean(suavizadas[False]):>10.3f} {np.mean(suavizadas[True]):>10.3f}")
+
+
+def obstaculos_sinteticos(cantidad, puntos, semilla, lado=0.4):
+    """
+    `cantidad` cuadrados de `lado` m con posición y giro aleatorios dentro de la arena, sin cubrir
+    ninguno de `puntos` (inicios y objetivos) para que todos los segmentos tengan solución posible.
+    """
+    generador = random.Random(semilla)
+    x_min, y_min, x_max, y_max = limites_mapa((ANCHO_ESPACIO, ALTO_ESPACIO))
+    # El robot con margen debe caber en cualquier orientación al inicio y al final de cada segmento
+    separacion = math.hypot(ANCHO_ROBOT_EFECTIVO / 2, ALTO_ROBOT_EFECTIVO / 2) + MARGEN
+    puntos = [Point(p) for p in puntos]
+    obstaculos = []
+    intentos = 0
+    while len(obstaculos) < cantidad and intentos < 1000 * max(cantidad, 1):
+        intentos += 1
+        cx, cy = generador.uniform(x_min + lado, x_max - lado), generador.uniform(y_min + lado, y_max - lado)
+        angulo = generador.uniform(0, math.pi / 2)
+        c, s = math.cos(angulo), math.sin(angulo)
+        vertices = [(cx + c * dx - s * dy, cy + s * dx + c * dy)
+                    for dx, dy in ((-lado / 2, -lado / 2), (lado / 2, -lado / 2), (lado / 2, lado / 2), (-lado / 2, lado / 2))]
+        poligono = Polygon(vertices)
+        if all(poligono.distance(punto) > separacion for punto in puntos):
+            obstaculos.append(vertices)
+    return obstaculos
+
+
+def planificar_escenario(obstaculos, segmentos, semilla, iteraciones):
+    """
+    Planea todos los segmentos con los parámetros de `generate_paths` (salvo `iteraciones`) y
+    regresa las métricas sumadas del escenario.
+    """
+    metricas = {'iteraciones': 0, 'segundos': 0.0, 'primera_solucion': [], 'fallidos': 0,
+                'costo': {}, **dict.fromkeys(CONTADORES, 0)}
+    for robot, segmento, inicio, objetivo in segmentos:
+        segundos, rrt_star = medir(RRTStar, inicio, objetivo, obstaculos, iteraciones,
+                                   semilla_segmento(semilla, robot, segmento), max_iter_sin_mejora=1000)
+        metricas['iteraciones'] += rrt_star.iteraciones
+        metricas['segundos'] += segundos
+        for contador in CONTADORES:
+            metricas[contador] += getattr(rrt_star.colisiones, contador)
+        if rrt_star.ruta is None:
+            metricas['fallidos'] += 1
+            continue
+        metricas['primera_solucion'].append(rrt_star.tiempo_primera_solucion)
+        metricas['costo'][robot] = metricas['costo'].get(robot, 0.0) + longitud_ruta(rrt_star.ruta)
+    return metricas
+
+
+def comparar_escenarios(iteraciones, semillas, densidades, salida=None):
+    """
+    Reproduce el escenario de `input/` y campos sintéticos con `densidades` obstáculos sobre las
+    mismas posiciones: iteraciones por segundo, tiempo a la primera solución, costo final por robot y
+    pruebas de colisión, promediados sobre semillas. El costo de `input/` se compara con `best/1..4`.
+    """
+    posiciones_iniciales = parse_initial_positions('input/InitialPositions.txt')
+    posiciones_objetivo = parse_target_positions('input/TargetPositions.txt')
+    segmentos = segmentos_robots(posiciones_iniciales, posiciones_objetivo)
+    escenarios = [('input', parse_obstacles('input'))]
+    for densidad in densidades:
+        obstaculos = obstaculos_sinteticos(densidad, list(posiciones_iniciales) + list(posiciones_objetivo), densidad)
+        escenarios.append((f'sintetico_{len(obstaculos)}', obstaculos))
+
+    resultados = []
+    print(f"{'escenario':>14} {'it/s':>7} {'1a sol. s':>9} {'robot 1':>8} {'robot 2':>8} {'fallidos':>8} "
+          f"{'punto':>8} {'arista':>9} {'geometría':>9} {'campo':>9}")
+    for nombre, obstaculos in escenarios:
+        corridas = [planificar_escenario(obstaculos, segmentos, semilla, iteraciones) for semilla in semillas]
+        iteraciones_totales = sum(c['iteraciones'] for c in corridas)
+        primeras = [t for c in corridas for t in c['primera_solucion']]
+        resultado = {
+            'escenario': nombre,
+            'obstaculos': len(obstaculos),
+            'semillas': list(semillas),
+            'iteraciones_por_segundo': iteraciones_totales / sum(c['segundos'] for c in corridas),
+            'primera_solucion_s': float(np.mean(primeras)) if primeras else None,
+            'fallidos': sum(c['fallidos'] for c in corridas),
+            # Solo las corridas en que el robot completó todos sus segmentos
+            'costo': {robot: float(np.mean([c['costo'][robot] for c in corridas
+                                            if c['fallidos'] == 0 and robot in c['costo']] or [math.inf]))
+                      for robot in (1, 2)},
+            **{contador: sum(c[contador] for c in corridas) / len(corridas) for contador in CONTADORES},
+        }
+        resultados.append(resultado)
+        primera = f"{resultado['primera_solucion_s']:.4f}" if primeras else '-'
+        print(f"{nombre:>14} {resultado['iteraciones_por_segundo']:>7.0f} {primera:>9} "
+              f"{resultado['costo'][1]:>8.3f} {resultado['costo'][2]:>8.3f} {resultado['fallidos']:>8} "
+              + " ".join(f"{resultado[c]:>{9 if c != 'pruebas_punto' else 8}.0f}" for c in CONTADORES))
+
+    # Las soluciones guardadas son las rutas completas de cada robot, que pasan por los mismos puntos
+    referencias = {}
+    costo_input = resultados[0]['costo']
+    print(f"\n{'referencia':>14} {'robot 1':>8} {'robot 2':>8} {'diferencia':>10}")
+    for k in range(1, 5):
+        longitudes = [longitud_ruta(ruta) for ruta in load_paths_from_directory(f'best/{k}/')]
+        referencias[f'best/{k}'] = longitudes
+        diferencia = (costo_input[1] + costo_input[2]) / sum(longitudes) - 1
+        print(f"{f'best/{k}':>14} {longitudes[0]:>8.3f} {longitudes[1]:>8.3f} {diferencia:>+10.1%}")
+
+    if salida is not None:
+        with open(salida, 'w') as archivo:
+            json.dump({'iteraciones': iteraciones, 'resultados': resultados, 'referencias': referencias}, archivo, indent=2)
+        print(f"Resultados guardados en {salida}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del planificador RRT*")
+    parser.add_argument('--iteraciones', type=int, nargs='+', default=[2000, 5000, 10000])
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--comparacion', choices=['indice', 'informado', 'escenarios'], default='indice')
+    parser.add_argument('--repeticiones', type=int, default=5,
+                        help="Semillas a promediar en las comparaciones 'informado' y 'escenarios'")
+    parser.add_argument('--densidades', type=int, nargs='+', default=[5, 10, 20],
+                        help="Obstáculos de cada campo sintético en la comparación 'escenarios'")
+    parser.add_argument('--salida', help="Archivo JSON para los resultados de la comparación 'escenarios'")
+    args = parser.parse_args()
+    if args.comparacion == 'indice':
+        comparar_indice(args.iteraciones, args.semilla)
+    elif args.comparacion == 'escenarios':
+        # Máximo de iteraciones por segmento; generate_paths usa 30000
+        comparar_escenarios(max(args.iteraciones), range(args.semilla, args.semilla + args.repeticiones),
+                            args.densidades, args.salida)
+    else:
+        comparar_informado(args.iteraciones, range(args.semilla, args.semilla + args.repeticiones))
@@ -0,0 +1,40 @@
+"""
+Caché en disco de arreglos precalculados a partir de los obstáculos de la arena
+
+TC2008B
+Grupo: 303
+Equipo: 1
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import shapely
+
+
+def clave(partes, poligonos):
+    """Hash de los parámetros (`partes`) y de la geometría de los obstáculos."""
+    h = hashlib.sha256("|".join(str(parte) for parte in partes).encode())
+    for poligono in poligonos:
+        h.update(shapely.to_wkb(poligono))
+    return h.hexdigest()
+
+
+def cargar_o_construir(directorio, clave, construir):
+    """
+    Arreglos guardados en `directorio` bajo `clave`; si no existen, los obtiene de `construir()`
+    (un diccionario nombre -> arreglo) y los guarda para la siguiente vez.
+    """
+    ruta = os.path.join(directorio, f"{clave}.npz")
+    if os.path.exists(ruta):
+        with np.load(ruta) as datos:
+            return {nombre: datos[nombre] for nombre in datos.files}
+    arreglos = construir()
+    os.makedirs(directorio, exist_ok=True)
+    # Escritura atómica: varios procesos pueden construir el mismo archivo a la vez
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'wb') as archivo:
+        np.savez(archivo, **arreglos)
+    os.replace(temporal, ruta)
+    return arreglos
@@ -0,0 +1,85 @@
+"""
+Campo de distancias con signo precalculado para los obstáculos de la arena
+
+TC2008B
+Grupo: 303
+Equipo: 1
+"""
+
+import math
+
+import numpy as np
+import shapely
+
+import cache_disco
+
+# Cambiar al modificar el formato o la forma de construir el campo, para invalidar los archivos guardados
+VERSION_CAMPO = 2
+DIRECTORIO_CAMPOS = 'campos_distancia'
+
+
+def clave_campo(poligonos, limites, resolucion):
+    """Hash de la geometría de los obstáculos (ya con margen) y de la cuadrícula."""
+    return cache_disco.clave((VERSION_CAMPO, limites, resolucion), poligonos)
+
+
+class CampoDistancias:
+    """
+    Distancia con signo a los obstáculos muestreada en los centros de una cuadrícula fina.
+
+    Es positiva fuera de los obstáculos y negativa dentro. Como la distancia cambia a lo más tanto
+    como se mueve el punto, el valor de la celda más cercana difiere del real a lo más en `error`
+    (media diagonal de celda), lo que permite responder consultas en O(1) con cotas conservadoras.
+    """
+
+    # Campos ya cargados en este proceso, por clave
+    _cargados = {}
+
+    def __init__(self, distancias, limites, resolucion):
+        self.distancias = distancias
+        self.limites = tuple(limites)  # (x_min, y_min, x_max, y_max)
+        self.resolucion = resolucion
+        self.error = resolucion * math.sqrt(2) / 2
+
+    @classmethod
+    def construir(cls, poligonos, limites, resolucion):
+        x_min, y_min, x_max, y_max = limites
+        xs = np.arange(x_min + resolucion / 2, x_max, resolucion)
+        ys = np.arange(y_min + resolucion / 2, y_max, resolucion)
+        X, Y = np.meshgrid(xs, ys, indexing='ij')
+        union = shapely.union_all(poligonos)
+        puntos = shapely.points(X.ravel(), Y.ravel())
+        dentro = shapely.contains_xy(union, X.ravel(), Y.ravel())
+        distancias = shapely.distance(puntos, union)
+        if dentro.any():
+            distancias[dentro] = -shapely.distance(puntos[dentro], union.boundary)
+        return cls(distancias.reshape(X.shape), limites, resolucion)
+
+    @classmethod
+    def cargar_o_construir(cls, poligonos, limites, resolucion=0.01, directorio=DIRECTORIO_CAMPOS):
+        """Regresa el campo de estos obstáculos desde memoria, desde disco o construyéndolo y guardándolo."""
+        clave = clave_campo(poligonos, limites, resolucion)
+        if clave in cls._cargados:
+            return cls._cargados[clave]
+        arreglos = cache_disco.cargar_o_construir(
+            directorio, clave, lambda: {'distancias': cls.construir(poligonos, limites, resolucion).distancias})
+        campo = cls(arreglos['distancias'], limites, resolucion)
+        cls._cargados[clave] = campo
+        return campo
+
+    def distancia(self, x, y):
+        """Distancia con signo en la celda de (x, y); -inf fuera de la cuadrícula."""
+        i = int((x - self.limites[0]) / self.resolucion)
+        j = int((y - self.limites[1]) / self.resolucion)
+        if x < self.limites[0] or y < self.limites[1] or i >= self.distancias.shape[0] or j >= self.distancias.shape[1]:
+            return -math.inf
+        return float(self.distancias[i, j])
+
+    def distancias_en(self, xs, ys):
+        """Versión vectorizada de `distancia`."""
+        i = np.floor((np.asarray(xs) - self.limites[0]) / self.resolucion).astype(np.int64)
+        j = np.floor((np.asarray(ys) - self.limites[1]) / self.resolucion).astype(np.int64)
+        dentro = (i >= 0) & (j >= 0) & (i < self.distancias.shape[0]) & (j < self.distancias.shape[1])
+        resultado = np.full(i.shape, -np.inf)
+        resultado[dentro] = self.distancias[i[dentro], j[dentro]]
+        return resultado
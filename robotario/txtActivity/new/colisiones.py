@@ -0,0 +1,185 @@
+"""
+Verificación de colisiones del robot contra los obstáculos
+
+TC2008B
+Grupo: 303
+Equipo: 1
+"""
+
+import math
+
+import numpy as np
+import shapely
+from shapely.geometry import LineString, Point, Polygon
+from shapely.prepared import prep
+from shapely.strtree import STRtree
+
+
+# Signos de las esquinas del rectángulo del robot en su marco local
+ESQUINAS = np.array([(-1, -1), (1, -1), (1, 1), (-1, 1)], dtype=float)
+
+
+class VerificadorColisiones:
+    """
+    Pruebas de colisión del rectángulo del robot contra un conjunto fijo de obstáculos.
+
+    Los obstáculos se guardan como geometrías preparadas dentro de un STRtree. Antes de construir el
+    rectángulo del robot se consulta el árbol con el círculo que circunscribe al robot (`dwithin`);
+    si ningún obstáculo está a esa distancia no hace falta más geometría. Una arista se prueba de
+    una sola vez con el área barrida por el robot al recorrerla, que para un rectángulo orientado en
+    la dirección de avance es otro rectángulo alargado. `aristas_libres` hace lo mismo para un lote
+    de aristas con las operaciones vectorizadas de shapely.
+
+    Con un `CampoDistancias` de los mismos obstáculos, las pruebas consultan primero el despeje de la
+    celda en O(1) y solo recurren a la geometría cuando la cota no basta para decidir.
+    """
+
+    def __init__(self, poligonos, ancho_robot, alto_robot, campo=None):
+        self.campo = campo
+        self.poligonos = list(poligonos)
+        self.preparados = [prep(poligono) for poligono in self.poligonos]
+        self.arbol = STRtree(self.poligonos)
+        self.ancho_robot = ancho_robot
+        self.alto_robot = alto_robot
+        # Radio del círculo que circunscribe al robot
+        self.radio_robot = math.hypot(ancho_robot / 2, alto_robot / 2)
+        # Contadores de consultas, útiles para benchmarks
+        self.pruebas_punto = 0
+        self.pruebas_arista = 0
+        self.pruebas_geometria = 0
+        self.pruebas_campo = 0
+
+    def huella(self, x, y, theta, largo_extra=0.0):
+        """Rectángulo del robot centrado en (x, y), con el ancho a lo largo de la orientación theta (rad)."""
+        medio_largo = (self.ancho_robot + largo_extra) / 2
+        medio_alto = self.alto_robot / 2
+        c, s = math.cos(theta), math.sin(theta)
+        return Polygon([
+            (x + c * dx - s * dy, y + s * dx + c * dy)
+            for dx, dy in ((-medio_largo, -medio_alto), (medio_largo, -medio_alto),
+                           (medio_largo, medio_alto), (-medio_largo, medio_alto))
+        ])
+
+    def _interseca(self, candidatos, geometria):
+        self.pruebas_geometria += 1
+        return any(self.preparados[i].intersects(geometria) for i in candidatos)
+
+    def _decidir_con_campo(self, x, y, alcance):
+        """
+        Con el campo de distancias decide si todo lo que está a lo más `alcance` de (x, y) está libre
+        (True) o si (x, y) está dentro de un obstáculo (False); None si hace falta la geometría.
+        """
+        if self.campo is None:
+            return None
+        distancia = self.campo.distancia(x, y)
+        if distancia - self.campo.error > alcance:
+            self.pruebas_campo += 1
+            return True
+        if -math.inf < distancia < -self.campo.error:
+            self.pruebas_campo += 1
+            return False
+        return None
+
+    def punto_en_colision(self, x, y, theta=0.0):
+        self.pruebas_punto += 1
+        libre = self._decidir_con_campo(x, y, self.radio_robot)
+        if libre is not None:
+            return not libre
+        candidatos = self.arbol.query(Point(x, y), predicate='dwithin', distance=self.radio_robot)
+        if len(candidatos) == 0:
+            return False
+        return self._interseca(candidatos, self.huella(x, y, theta))
+
+    def centro_en_obstaculo(self, x, y):
+        """Indica si el punto (x, y) cae dentro de un obstáculo, sin considerar el tamaño del robot."""
+        self.pruebas_punto += 1
+        libre = self._decidir_con_campo(x, y, 0.0)
+        if libre is not None:
+            return not libre
+        return len(self.arbol.query(Point(x, y), predicate='intersects')) > 0
+
+    def arista_libre(self, x1, y1, x2, y2):
+        """Verifica que el robot pueda avanzar en línea recta de (x1, y1) a (x2, y2) sin colisionar."""
+        self.pruebas_arista += 1
+        distancia = math.hypot(x2 - x1, y2 - y1)
+        if distancia == 0:
+            return not self.punto_en_colision(x1, y1)
+        # El área barrida está a lo más (distancia / 2 + radio del robot) del punto medio
+        libre = self._decidir_con_campo((x1 + x2) / 2, (y1 + y2) / 2, distancia / 2 + self.radio_robot)
+        if libre is not None:
+            return libre
+        candidatos = self.arbol.query(LineString([(x1, y1), (x2, y2)]), predicate='dwithin', distance=self.radio_robot)
+        if len(candidatos) == 0:
+            return True
+        theta = math.atan2(y2 - y1, x2 - x1)
+        barrido = self.huella((x1 + x2) / 2, (y1 + y2) / 2, theta, largo_extra=distancia)
+        return not self._interseca(candidatos, barrido)
+
+    def aristas_libres(self, x, y, xs, ys, theta=0.0):
+        """
+        Versión por lotes de `arista_libre` para las aristas que unen (x, y) con cada punto de
+        (`xs`, `ys`); regresa una máscara booleana con las que están libres de colisión.
+        `theta` (escalar o arreglo) es la orientación usada en las aristas de longitud cero.
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        libres = np.ones(len(xs), dtype=bool)
+        if len(xs) == 0:
+            return libres
+        if len(xs) == 1:
+            # Para una sola arista la prueba escalar es más barata que armar los arreglos
+            if xs[0] == x and ys[0] == y:
+                libres[0] = not self.punto_en_colision(x, y, float(np.ravel(theta)[0]))
+            else:
+                libres[0] = self.arista_libre(x, y, float(xs[0]), float(ys[0]))
+            return libres
+        self.pruebas_arista += len(xs)
+        dx, dy = xs - x, ys - y
+        distancia = np.hypot(dx, dy)
+        # Todas las áreas barridas caben en el círculo de radio (arista más larga + radio del robot)
+        alcance = distancia.max() + self.radio_robot
+        if self.campo is not None:
+            decision = self._decidir_con_campo(x, y, alcance)
+            if decision is not None:
+                libres[:] = decision
+                return libres
+            # Descarta por arista con el despeje de su punto medio
+            despejes = self.campo.distancias_en((x + xs) / 2, (y + ys) / 2) - self.campo.error
+            pendientes = np.flatnonzero(despejes <= distancia / 2 + self.radio_robot)
+            self.pruebas_campo += len(xs) - len(pendientes)
+            if len(pendientes) == 0:
+                return libres
+            xs, ys, dx, dy, distancia = xs[pendientes], ys[pendientes], dx[pendientes], dy[pendientes], distancia[pendientes]
+            theta = np.broadcast_to(theta, libres.shape)[pendientes]
+        elif len(self.arbol.query(Point(x, y), predicate='dwithin', distance=alcance)) == 0:
+            return libres
+        else:
+            pendientes = np.arange(len(xs))
+        angulo = np.where(distancia == 0, theta, np.arctan2(dy, dx))
+        c, s = np.cos(angulo)[:, None], np.sin(angulo)[:, None]
+        largo = ESQUINAS[:, 0] * (self.ancho_robot + distancia[:, None]) / 2
+        alto = ESQUINAS[:, 1] * self.alto_robot / 2
+        esquinas = np.stack([(x + xs)[:, None] / 2 + c * largo - s * alto,
+                             (y + ys)[:, None] / 2 + s * largo + c * alto], axis=-1)
+        self.pruebas_geometria += 1
+        # El árbol descarta por envolvente y evalúa `intersects` solo en los pares restantes
+        aristas, _ = self.arbol.query(shapely.polygons(esquinas), predicate='intersects')
+        libres[pendientes[aristas]] = False
+        return libres
+
+    def suavizar_ruta(self, ruta):
+        """
+        Atajos voraces: desde cada punto salta al punto más lejano de la ruta que se alcanza en línea
+        recta sin colisión. Conserva el primer y el último punto y nunca alarga la ruta.
+        """
+        if ruta is None or len(ruta) < 3:
+            return ruta
+        suavizada = [ruta[0]]
+        i = 0
+        while i < len(ruta) - 1:
+            j = len(ruta) - 1
+            while j > i + 1 and not self.arista_libre(ruta[i][0], ruta[i][1], ruta[j][0], ruta[j][1]):
+                j -= 1
+            suavizada.append(ruta[j])
+            i = j
+        return suavizada
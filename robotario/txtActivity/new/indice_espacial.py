@@ -0,0 +1,98 @@
+"""
+Índice espacial incremental para las consultas de vecinos de RRT*
+
+TC2008B
+Grupo: 303
+Equipo: 1
+"""
+
+import math
+
+
+class IndiceEspacial:
+    """
+    Hash de cuadrícula uniforme que crece conforme se agregan puntos.
+
+    Cada celda mide `tamano_celda` por lado (RRT* usa un tercio del radio de búsqueda), de modo que una
+    consulta de radio solo revisa las celdas que toca y la del vecino más cercano recorre anillos de
+    celdas hacia afuera hasta que ningún anillo restante puede tener un punto más cercano.
+    Los resultados conservan el orden de inserción para desempatar igual que una búsqueda lineal.
+    """
+
+    def __init__(self, tamano_celda):
+        self.tamano_celda = tamano_celda
+        self.celdas = {}  # (i, j) -> lista de (orden, x, y, elemento)
+        self.total = 0
+        self.limites = None  # (i_min, i_max, j_min, j_max) de las celdas ocupadas
+
+    def __len__(self):
+        return self.total
+
+    def _celda(self, x, y):
+        return (math.floor(x / self.tamano_celda), math.floor(y / self.tamano_celda))
+
+    def insertar(self, x, y, elemento):
+        i, j = self._celda(x, y)
+        self.celdas.setdefault((i, j), []).append((self.total, x, y, elemento))
+        self.total += 1
+        if self.limites is None:
+            self.limites = (i, i, j, j)
+        else:
+            i_min, i_max, j_min, j_max = self.limites
+            self.limites = (min(i_min, i), max(i_max, i), min(j_min, j), max(j_max, j))
+
+    def mas_cercano(self, x, y):
+        """Regresa el elemento más cercano a (x, y), o None si el índice está vacío."""
+        if self.limites is None:
+            return None
+        ci, cj = self._celda(x, y)
+        i_min, i_max, j_min, j_max = self.limites
+        anillo_max = max(abs(ci - i_min), abs(ci - i_max), abs(cj - j_min), abs(cj - j_max))
+        # Distancia de (x, y) al borde más cercano de su propia celda
+        holgura = min(x - ci * self.tamano_celda, (ci + 1) * self.tamano_celda - x,
+                      y - cj * self.tamano_celda, (cj + 1) * self.tamano_celda - y)
+        mejor = None  # (distancia, orden, elemento)
+        for anillo in range(anillo_max + 1):
+            # Los puntos de este anillo y de los posteriores están al menos a esta distancia
+            if mejor is not None and mejor[0] < (anillo - 1) * self.tamano_celda + holgura:
+                break
+            for celda in self._celdas_anillo(ci, cj, anillo):
+                for orden, px, py, elemento in self.celdas.get(celda, ()):
+                    distancia = math.hypot(px - x, py - y)
+                    if mejor is None or (distancia, orden) < mejor[:2]:
+                        mejor = (distancia, orden, elemento)
+        return mejor[2] if mejor else None
+
+    def _celdas_anillo(self, ci, cj, anillo):
+        if anillo == 0:
+            yield (ci, cj)
+            return
+        for i in range(ci - anillo, ci + anillo + 1):
+            yield (i, cj - anillo)
+            yield (i, cj + anillo)
+        for j in range(cj - anillo + 1, cj + anillo):
+            yield (ci - anillo, j)
+            yield (ci + anillo, j)
+
+    def candidatos(self, x, y, radio):
+        """Regresa los elementos de las celdas que tocan el cuadrado de lado 2 * `radio` centrado en (x, y)."""
+        i_min, j_min = self._celda(x - radio, y - radio)
+        i_max, j_max = self._celda(x + radio, y + radio)
+        encontrados = []
+        for i in range(i_min, i_max + 1):
+            for j in range(j_min, j_max + 1):
+                encontrados.extend(elemento for _, _, _, elemento in self.celdas.get((i, j), ()))
+        return encontrados
+
+    def en_radio(self, x, y, radio):
+        """Regresa los elementos a una distancia menor o igual a `radio` de (x, y)."""
+        i_min, j_min = self._celda(x - radio, y - radio)
+        i_max, j_max = self._celda(x + radio, y + radio)
+        encontrados = []
+        for i in range(i_min, i_max + 1):
+            for j in range(j_min, j_max + 1):
+                for orden, px, py, elemento in self.celdas.get((i, j), ()):
+                    if math.hypot(px - x, py - y) <= radio:
+                        encontrados.append((orden, elemento))
+        encontrados.sort(key=lambda par: par[0])
+        return [elemento for _, elemento in encontrados]
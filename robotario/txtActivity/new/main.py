@@ -6,9 +6,25 @@ Grupo: 303
 Equipo: 1
 """
 
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
-import matplotlib.animation as animation
+from matplotlib.animation import FuncAnimation
+import numpy as np
+from PIL import Image
+from shapely.geometry import Polygon
+
+from arbol import Arbol
+from campo_distancias import CampoDistancias
+from colisiones import VerificadorColisiones
+from indice_espacial import IndiceEspacial
+from mapa_rutas import MapaRutas
 
 # Dimensiones del robot (m)
 ANCHO_ROBOT = 0.18
@@ -24,6 +40,8 @@ ALTO_ROBOT_EFECTIVO = ALTO_ROBOT + 2 * MARGEN
 # Agrega estas variables globales después de las dimensiones existentes
 VELOCIDAD_ROBOT = 0.02  # metros por cuadro
 ALFA_RUTA = 0.3   # transparencia de las líneas de la ruta
+# Tamaño de celda del campo de distancias de los obstáculos (m)
+RESOLUCION_CAMPO = 0.01
 
 
 def parse_initial_positions(file_path):
@@ -88,24 +106,31 @@ def parse_obstacles(directory_path):
 # TODO: Función `is_in_robot` para verificar no solo si estamos colisionando con un obstáculo, sino también si estamos colisionando con otro robot. También, podría revisar este enlace: https://www.metanetsoftware.com/technique/tutorialA.html, para la detección de colisiones.
 
 
-# Clase Nodo que representa un estado en el espacio
-class Nodo:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.padre = None
-        self.costo = 0
+def crear_verificador(obstaculos, tamano_mapa, usar_campo_distancias=True):
+    """Verificador de colisiones del robot para estos obstáculos, con el margen agregado."""
+    # Convierte los obstáculos a Polígonos de shapely y agrega el margen
+    poligonos_obstaculos = [Polygon(obstaculo).buffer(MARGEN) for obstaculo in obstaculos]
+    # Campo de distancias de la arena, guardado en disco por hash de los obstáculos
+    campo = None
+    if usar_campo_distancias:
+        campo = CampoDistancias.cargar_o_construir(poligonos_obstaculos, limites_mapa(tamano_mapa), RESOLUCION_CAMPO)
+    return VerificadorColisiones(poligonos_obstaculos, ANCHO_ROBOT_EFECTIVO, ALTO_ROBOT_EFECTIVO, campo)
+
+
+def limites_mapa(tamano_mapa):
+    """(x_min, y_min, x_max, y_max) de un mapa centrado en el origen."""
+    return (-tamano_mapa[0] / 2, -tamano_mapa[1] / 2, tamano_mapa[0] / 2, tamano_mapa[1] / 2)
+
 
 # Clase del algoritmo RRT*
 class RRTStar:
-    def __init__(self, inicio, objetivo, obstaculos, tamano_mapa, tamano_paso=0.05, max_iter=2000, objetivo_bias=0.1, umbral_mejora=0.01, max_iter_sin_mejora=100):
-        self.inicio = Nodo(inicio[0], inicio[1])
-        self.objetivo = Nodo(objetivo[0], objetivo[1])
+    def __init__(self, inicio, objetivo, obstaculos, tamano_mapa, tamano_paso=0.05, max_iter=2000, objetivo_bias=0.1, umbral_mejora=0.01, max_iter_sin_mejora=100, usar_campo_distancias=True, muestreo_informado=True, suavizar=True):
+        self.inicio = tuple(inicio)
+        self.objetivo = tuple(objetivo)
         self.obstaculos = obstaculos
         self.tamano_mapa = tamano_mapa
         self.tamano_paso = tamano_paso
         self.max_iter = max_iter
-        self.lista_nodos = [self.inicio]
         self.radio_region_objetivo = 0.1  # Según consideraciones
         self.radio_busqueda = 0.3       # Según consideraciones
         self.ruta = None
@@ -113,220 +138,309 @@ class RRTStar:
         self.objetivo_bias = objetivo_bias
         self.umbral_mejora = umbral_mejora
         self.max_iter_sin_mejora = max_iter_sin_mejora
-        # Convierte los obstáculos a Polígonos de shapely y agrega el margen
-        self.poligonos_obstaculos = [Polygon(obstaculo).buffer(MARGEN) for obstaculo in self.obstaculos]
+        # Con una solución, muestrea solo dentro de la elipse que puede contener una ruta mejor
+        self.muestreo_informado = muestreo_informado
+        self.mejor_costo = float('inf')
+        # Atajos sobre la ruta final con el mismo verificador de colisiones
+        self.suavizar = suavizar
+        self.colisiones = crear_verificador(obstaculos, tamano_mapa, usar_campo_distancias)
+        self.poligonos_obstaculos = self.colisiones.poligonos
+        # Árbol en arreglos: cada nodo es un índice (0 es el inicio)
+        self.arbol = Arbol(self.inicio[0], self.inicio[1])
+        # Índice espacial de los nodos del árbol, con celdas de un tercio del radio de búsqueda
+        self.indice = IndiceEspacial(self.radio_busqueda / 3)
+        self.indice.insertar(self.inicio[0], self.inicio[1], 0)
 
     # Métodos de utilidad general
-    def calcular_distancia(self, nodo1, nodo2):
-        return math.hypot(nodo2.x - nodo1.x, nodo2.y - nodo1.y)
+    def calcular_distancia(self, punto1, punto2):
+        return math.hypot(punto2[0] - punto1[0], punto2[1] - punto1[1])
 
-    def calcular_distancia_y_angulo(self, desde_nodo, hacia_nodo):
-        dx = hacia_nodo.x - desde_nodo.x
-        dy = hacia_nodo.y - desde_nodo.y
+    def calcular_distancia_y_angulo(self, desde_punto, hacia_punto):
+        dx = hacia_punto[0] - desde_punto[0]
+        dy = hacia_punto[1] - desde_punto[1]
         distancia = math.hypot(dx, dy)
         theta = math.atan2(dy, dx)
         return distancia, theta
 
-    # Método actualizado para usar shapely para la detección de colisiones
-    def esta_en_obstaculo(self, nodo):
+    def orientacion(self, i):
+        """Orientación (rad) del nodo `i`, dada por la arista desde su padre; 0 para la raíz."""
+        padre = self.arbol.padre[i]
+        if padre < 0:
+            return 0.0
+        return math.atan2(self.arbol.y[i] - self.arbol.y[padre], self.arbol.x[i] - self.arbol.x[padre])
+
+    def orientaciones(self, indices):
+        """Versión vectorizada de `orientacion` para un arreglo de nodos."""
+        padres = self.arbol.padre[indices]
+        raiz = padres < 0
+        padres = np.where(raiz, indices, padres)
+        angulos = np.arctan2(self.arbol.y[indices] - self.arbol.y[padres], self.arbol.x[indices] - self.arbol.x[padres])
+        return np.where(raiz, 0.0, angulos)
+
+    # Detección de colisiones con el STRtree de obstáculos preparados
+    def esta_en_obstaculo(self, x, y, theta=0.0):
         """
-        Verifica si el robot en la posición del nodo dado y orientación interseca algún obstáculo.
+        Verifica si el robot en la posición (x, y) con orientación theta (rad) interseca algún obstáculo.
         """
-        # Determina la orientación (theta) del robot
-        if nodo.padre:
-            dx = nodo.x - nodo.padre.x
-            dy = nodo.y - nodo.padre.y
-            theta = math.degrees(math.atan2(dy, dx))
-        else:
-            theta = 0  # Orientación predeterminada si no hay padre
-        
-        # Crea un rectángulo que representa las dimensiones del robot en la posición del nodo
-        rectangulo_robot = box(
-            nodo.x - ANCHO_ROBOT_EFECTIVO / 2,
-            nodo.y - ALTO_ROBOT_EFECTIVO / 2,
-            nodo.x + ANCHO_ROBOT_EFECTIVO / 2,
-            nodo.y + ALTO_ROBOT_EFECTIVO / 2
-        )
-        # Rota el rectángulo para representar la dirección de frente del robot
-        poligono_robot = rotate(rectangulo_robot, angle=theta, origin=(nodo.x, nodo.y))
-        
-        # Verifica la colisión con cualquier obstáculo
-        for poligono in self.poligonos_obstaculos:
-            if poligono_robot.intersects(poligono):
-                return True
-        return False
-
-    # Actualizado para verificar colisión a lo largo del borde entre nodos
-    def es_camino_libre_de_colision(self, nodo1, nodo2):
+        return self.colisiones.punto_en_colision(x, y, theta)
+
+    def es_camino_libre_de_colision(self, punto1, punto2, theta1=0.0):
         """
-        Verifica si el camino entre nodo1 y nodo2 está libre de colisiones,
-        considerando las dimensiones y orientación del robot en cada punto muestreado.
+        Verifica si el camino entre punto1 y punto2 está libre de colisiones, probando de una vez el
+        área que barre el robot orientado hacia punto2 en lugar de muestrear posiciones intermedias.
+        theta1 es la orientación del robot en punto1, usada si ambos puntos coinciden.
         """
-        distancia = self.calcular_distancia(nodo1, nodo2)
-        if distancia == 0:
-            # Los nodos están en la misma posición, verifica la colisión en este punto
-            nodo_temporal = Nodo(nodo1.x, nodo1.y)
-            nodo_temporal.padre = nodo1.padre
-            return not self.esta_en_obstaculo(nodo_temporal)
-        num_muestras = max(int(distancia / self.tamano_paso), 1)
-        for i in range(num_muestras + 1):
-            t = i / num_muestras
-            x = nodo1.x + t * (nodo2.x - nodo1.x)
-            y = nodo1.y + t * (nodo2.y - nodo1.y)
-            # Crea un nodo temporal para verificar la colisión
-            nodo_temporal = Nodo(x, y)
-            nodo_temporal.padre = nodo1
-            if self.esta_en_obstaculo(nodo_temporal):
-                return False
-        return True
-
-    # Actualizado para usar es_camino_libre_de_colision para la detección de colisiones en el borde
-    def es_libre_de_colision(self, nodo):
-        if self.esta_en_obstaculo(nodo):
-            return False
-        if not (-self.tamano_mapa[0]/2 <= nodo.x <= self.tamano_mapa[0]/2 and
-                -self.tamano_mapa[1]/2 <= nodo.y <= self.tamano_mapa[1]/2):
-            return False
-        # Verifica la colisión a lo largo del camino desde el padre hasta el nodo actual
-        if nodo.padre and not self.es_camino_libre_de_colision(nodo.padre, nodo):
+        if punto1 == punto2:
+            return not self.esta_en_obstaculo(punto1[0], punto1[1], theta1)
+        return self.colisiones.arista_libre(punto1[0], punto1[1], punto2[0], punto2[1])
+
+    def es_libre_de_colision(self, punto, padre):
+        if not (-self.tamano_mapa[0]/2 <= punto[0] <= self.tamano_mapa[0]/2 and
+                -self.tamano_mapa[1]/2 <= punto[1] <= self.tamano_mapa[1]/2):
             return False
-        return True
+        # El área barrida desde el padre incluye al robot en el punto final con la orientación de llegada
+        return self.es_camino_libre_de_colision(self.arbol.punto(padre), punto, self.orientacion(padre))
 
     # Métodos en el orden en que se llaman en plan()
     def obtener_nodo_aleatorio(self):
         if random.random() < self.objetivo_bias:
-            return Nodo(self.objetivo.x, self.objetivo.y)
+            return self.objetivo
+        elif self.muestreo_informado and self.mejor_costo < float('inf'):
+            return self.muestra_informada()
         else:
-            return Nodo(
+            return (
                 random.uniform(-self.tamano_mapa[0]/2, self.tamano_mapa[0]/2),
                 random.uniform(-self.tamano_mapa[1]/2, self.tamano_mapa[1]/2)
             )
 
-    def obtener_nodo_mas_cercano(self, nodo_aleatorio):
-        distancias = [self.calcular_distancia(nodo, nodo_aleatorio) for nodo in self.lista_nodos]
-        indice_minimo = distancias.index(min(distancias))
-        return self.lista_nodos[indice_minimo]
+    def ejes_elipse(self):
+        """
+        Semiejes (a, b) de la elipse con focos en el inicio y el objetivo donde la suma de distancias
+        a ambos es menor que el mejor costo; fuera de ella ningún punto mejora la ruta. El costo se
+        amplía con el radio de la región objetivo porque la ruta termina cerca del objetivo.
+        """
+        distancia_minima = self.calcular_distancia(self.inicio, self.objetivo)
+        eje_mayor = self.mejor_costo + self.radio_region_objetivo
+        return eje_mayor / 2, math.sqrt(max(eje_mayor ** 2 - distancia_minima ** 2, 0.0)) / 2
+
+    def muestra_informada(self):
+        """Punto uniforme dentro de la elipse de `ejes_elipse`."""
+        a, b = self.ejes_elipse()
+        theta = self.calcular_distancia_y_angulo(self.inicio, self.objetivo)[1]
+        # Punto uniforme en el disco unitario, escalado a la elipse y rotado hacia el objetivo
+        r = math.sqrt(random.random())
+        angulo = random.uniform(0, 2 * math.pi)
+        x, y = a * r * math.cos(angulo), b * r * math.sin(angulo)
+        c, s = math.cos(theta), math.sin(theta)
+        return (
+            (self.inicio[0] + self.objetivo[0]) / 2 + c * x - s * y,
+            (self.inicio[1] + self.objetivo[1]) / 2 + s * x + c * y
+        )
 
-    def dirigir(self, desde_nodo, hacia_nodo):
-        distancia, theta = self.calcular_distancia_y_angulo(desde_nodo, hacia_nodo)
+    def radio_vecinos(self):
+        """
+        Radio de reconexión. Con muestreo informado los nodos se concentran en la elipse, así que el
+        radio se reduce como en RRT* (gamma * sqrt(log n / n), con gamma según el área de la elipse)
+        para que el número de vecinos no crezca con la densidad; nunca excede radio_busqueda.
+        """
+        if not (self.muestreo_informado and self.mejor_costo < float('inf')):
+            return self.radio_busqueda
+        a, b = self.ejes_elipse()
+        n = len(self.arbol)
+        gamma = 2 * math.sqrt(1.5) * math.sqrt(a * b)  # 2 (1 + 1/d)^(1/d) (área / π)^(1/d), con d = 2
+        return min(self.radio_busqueda, gamma * math.sqrt(math.log(n) / n))
+
+    def obtener_nodo_mas_cercano(self, punto_aleatorio):
+        return self.indice.mas_cercano(punto_aleatorio[0], punto_aleatorio[1])
+
+    def dirigir(self, desde_nodo, hacia_punto):
+        """Regresa el punto a lo más tamano_paso desde el nodo `desde_nodo` hacia `hacia_punto`, y su distancia."""
+        desde_punto = self.arbol.punto(desde_nodo)
+        distancia, theta = self.calcular_distancia_y_angulo(desde_punto, hacia_punto)
         distancia = min(self.tamano_paso, distancia)
-        nuevo_nodo = Nodo(
-            desde_nodo.x + distancia * math.cos(theta),
-            desde_nodo.y + distancia * math.sin(theta)
+        nuevo_punto = (
+            desde_punto[0] + distancia * math.cos(theta),
+            desde_punto[1] + distancia * math.sin(theta)
         )
-        nuevo_nodo.costo = desde_nodo.costo + distancia
-        nuevo_nodo.padre = desde_nodo
-        return nuevo_nodo
-
-    def encontrar_vecinos(self, nuevo_nodo):
-        vecinos = []
-        for nodo in self.lista_nodos:
-            if self.calcular_distancia(nodo, nuevo_nodo) <= self.radio_busqueda:
-                vecinos.append(nodo)
-        return vecinos
-
-    def elegir_padre(self, vecinos, nodo_mas_cercano, nuevo_nodo):
-        mejor_costo = nodo_mas_cercano.costo + self.calcular_distancia(nodo_mas_cercano, nuevo_nodo)ons and addile_polygonleIleleGeneralty methodseeeeeeee_andlefrome, toetoefrometoefromeeeethod updated to usefor collision detectionis_inleeCheck if theat the given nodetion andtiots anyaclee thetioof theerenteerenteerentDefault orientation ifrentte aangling the robot'ss at the node'stion_recteEFFECTIVEWIDTHeEFFECTIVEHEIGHTeEFFECTIVEWIDTHeEFFECTIVEHEIGHTte theangle to the robot's facing directionrobot_y_recteeCheck forlwith anyacleyle_polygonrobot_yyUpdated to checklon along the edge betweeneis_collision_free_patheeCheck if the path betweene1 ande2 isl-freeconsidering the robot'ss and facing at each sampled pointeeeeeNodes are at the sametiochecklon at this pointtemp_nodeeeetemp_noderenterentis_inle(temp_nodesamplesestep_sizesamplessampleseeeeeete aary node forlon checkingtemp_nodeetemp_noderenteis_inle(temp_node    # Updated to use is_collision_free_path for edgel detectionisl_freeeis_inlee_sizee_size_sizee_sizeChecklon along the path fromrent to currenteerentis_collision_free_patherenteethods in ther they are called inget_random_nodegoalegoalgoalemap_sizemap_sizemap_sizemap_size    def get_nearest_node(self, rand_node):
-        mejor_nodo = nodo_mas_cercano
-        for nodo in vecinos:
-            costo = nodo.costo + self.calcular_distancia(nodo, nuevo_nodo)
-            if costo < mejor_costo and self.es_camino_libre_de_colision(nodo, nuevo_nodo):
-                mejor_costo = costo
-                mejor_nodo = nodo
-        nuevo_nodo.costo = mejor_costo
-        nuevo_nodo.padre = mejor_nodo
-        return nuevo_nodo
-
-    def reorganizar(self, nuevo_nodo, vecinos):
-        for nodo in vecinos:
-            costo_a_traves_de_nuevo = nuevo_nodo.costo + self.calcular_distancia(nuevo_nodo, nodo)
-            if costo_a_traves_de_nuevo < nodo.costo and self.es_camino_libre_de_colision(nuevo_nodo, nodo):
-                nodo.padre = nuevo_nodo
-                nodo.costo = costo_a_traves_de_nuevo
+        return nuevo_punto, distancia
+
+    def encontrar_vecinos(self, nuevo_punto):
+        """Índices (ordenados) de los nodos a lo más radio_vecinos() de `nuevo_punto`, con sus distancias."""
+        radio = self.radio_vecinos()
+        candidatos = np.array(self.indice.candidatos(nuevo_punto[0], nuevo_punto[1], radio), dtype=np.int64)
+        distancias = self.arbol.distancias(candidatos, nuevo_punto[0], nuevo_punto[1])
+        dentro = distancias <= radio
+        candidatos, distancias = candidatos[dentro], distancias[dentro]
+        orden = np.argsort(candidatos)
+        return candidatos[orden], distancias[orden]
+
+    def elegir_padre(self, vecinos, distancias, nodo_mas_cercano, nuevo_punto):
+        """Regresa el padre de menor costo con arista libre de colisión y el costo resultante."""
+        mejor_costo = self.arbol.costo[nodo_mas_cercano] + self.calcular_distancia(self.arbol.punto(nodo_mas_cercano), nuevo_punto)
+        costos = self.arbol.costo[vecinos] + distancias
+        mejora = costos < mejor_costo
+        candidatos, costos = vecinos[mejora], costos[mejora]
+        # Evaluación perezosa: primero se prueba solo el candidato más barato y, si choca, el resto en un lote
+        orden = np.argsort(costos, kind='stable')
+        for lote in (orden[:1], orden[1:]):
+            nodos = candidatos[lote]
+            libres = self.colisiones.aristas_libres(
+                nuevo_punto[0], nuevo_punto[1], self.arbol.x[nodos], self.arbol.y[nodos], self.orientaciones(nodos))
+            if libres.any():
+                elegido = lote[np.argmax(libres)]
+                return int(candidatos[elegido]), float(costos[elegido])
+        return nodo_mas_cercano, mejor_costo
+
+    def reorganizar(self, nuevo_nodo, vecinos, distancias):
+        arbol = self.arbol
+        costos_a_traves_de_nuevo = arbol.costo[nuevo_nodo] + distancias
+        mejora = costos_a_traves_de_nuevo < arbol.costo[vecinos]
+        nodos, costos_a_traves_de_nuevo = vecinos[mejora], costos_a_traves_de_nuevo[mejora]
+        if len(nodos) == 0:
+            return
+        libres = self.colisiones.aristas_libres(
+            arbol.x[nuevo_nodo], arbol.y[nuevo_nodo], arbol.x[nodos], arbol.y[nodos], self.orientacion(nuevo_nodo))
+        # El costo se vuelve a revisar porque una reconexión previa pudo cambiarlo
+        for nodo, costo_a_traves_de_nuevo in zip(nodos[libres].tolist(), costos_a_traves_de_nuevo[libres].tolist()):
+            if costo_a_traves_de_nuevo < arbol.costo[nodo]:
+                # Actualiza también el costo de los descendientes del nodo reconectado
+                arbol.cambiar_padre(nodo, nuevo_nodo, costo_a_traves_de_nuevo)
 
     def alcanzo_objetivo(self, nodo):
-        distancia = self.calcular_distancia(nodo, self.objetivo)
+        distancia = self.calcular_distancia(self.arbol.punto(nodo), self.objetivo)
         return distancia <= self.radio_region_objetivo
 
     def generar_ruta_final(self, nodo_objetivo):
-        ruta = []
-        nodo = nodo_objetivo
-        while nodo is not None:
-            ruta.append((nodo.x, nodo.y))
-            nodo = nodo.padre
-        return ruta[::-1]  # Invierte la ruta
+        return self.arbol.ruta(nodo_objetivo)
+
+    def suavizar_ruta(self, ruta):
+        """Acorta la ruta con atajos en línea recta libres de colisión (ver VerificadorColisiones.suavizar_ruta)."""
+        return self.colisiones.suavizar_ruta(ruta)
     
     # Coloca plan() como el último método
-    def planificar(self):
-        mejor_costo = float('inf')
+    def planificar(self, presupuesto_ms=None, al_mejorar=None):
+        """
+        Ejecuta RRT* y regresa la mejor ruta encontrada (None si no llegó al objetivo).
+
+        Con `presupuesto_ms` la búsqueda se detiene al agotar ese tiempo, además de las condiciones de
+        `max_iter` y `max_iter_sin_mejora`, y conserva la mejor ruta hasta ese momento. `al_mejorar`
+        se llama como al_mejorar(costo, ruta, iteracion, segundos) cada vez que mejora la ruta del
+        árbol; con `suavizar` los atajos se aplican una sola vez al final, sobre la mejor ruta.
+        Al terminar, `iteraciones`, `segundos`, `tiempo_primera_solucion` y `motivo_fin`
+        ('max_iter', 'sin_mejora' o 'presupuesto') describen la ejecución.
+        """
         contador_sin_mejora = 0
-
-        for _ in range(self.max_iter):
-            nodo_aleatorio = self.obtener_nodo_aleatorio()
-            nodo_mas_cercano = self.obtener_nodo_mas_cercano(nodo_aleatorio)
-            nuevo_nodo = self.dirigir(nodo_mas_cercano, nodo_aleatorio)
-
-            if self.es_libre_de_colision(nuevo_nodo):
-                vecinos = self.encontrar_vecinos(nuevo_nodo)
-                nuevo_nodo = self.elegir_padre(vecinos, nodo_mas_cercano, nuevo_nodo)
-                self.lista_nodos.append(nuevo_nodo)
-                self.reorganizar(nuevo_nodo, vecinos)
+        inicio = time.perf_counter()
+        limite = inicio + presupuesto_ms / 1000 if presupuesto_ms is not None else None
+        self.tiempo_primera_solucion = None
+        self.motivo_fin = 'max_iter'
+
+        iteracion = 0
+        while iteracion < self.max_iter:
+            if limite is not None and time.perf_counter() >= limite:
+                self.motivo_fin = 'presupuesto'
+                break
+            iteracion += 1
+            punto_aleatorio = self.obtener_nodo_aleatorio()
+            nodo_mas_cercano = self.obtener_nodo_mas_cercano(punto_aleatorio)
+            nuevo_punto, _ = self.dirigir(nodo_mas_cercano, punto_aleatorio)
+
+            if self.es_libre_de_colision(nuevo_punto, nodo_mas_cercano):
+                vecinos, distancias = self.encontrar_vecinos(nuevo_punto)
+                padre, costo = self.elegir_padre(vecinos, distancias, nodo_mas_cercano, nuevo_punto)
+                nuevo_nodo = self.arbol.agregar(nuevo_punto[0], nuevo_punto[1], padre, costo)
+                self.indice.insertar(nuevo_punto[0], nuevo_punto[1], nuevo_nodo)
+                self.reorganizar(nuevo_nodo, vecinos, distancias)
 
                 if self.alcanzo_objetivo(nuevo_nodo):
-                    costo_actual = nuevo_nodo.costo
-                    if costo_actual < mejor_costo:
-                        mejor_costo = costo_actual
+                    costo_actual = self.arbol.costo[nuevo_nodo]
+                    if costo_actual < self.mejor_costo:
+                        self.mejor_costo = costo_actual
                         self.ruta = self.generar_ruta_final(nuevo_nodo)
                         self.objetivo_alcanzado = True
                         contador_sin_mejora = 0
+                        segundos = time.perf_counter() - inicio
+                        if self.tiempo_primera_solucion is None:
+                            self.tiempo_primera_solucion = segundos
+                        if al_mejorar is not None:
+                            al_mejorar(float(self.mejor_costo), self.ruta, iteracion, segundos)
                     else:
                         contador_sin_mejora += 1
 
                     if contador_sin_mejora >= self.max_iter_sin_mejora:
+                        self.motivo_fin = 'sin_mejora'
                         break
 
+        if self.suavizar:
+            self.ruta = self.suavizar_ruta(self.ruta)
+        self.iteraciones = iteracion
+        self.segundos = time.perf_counter() - inicio
+        return self.ruta
+
 def asegurar_directorio_salida():
     """Crea el directorio de salida si no existe."""
     os.makedirs('output', exist_ok=True)
 
 
-            if self.is_collision_free(new_node):
-                neighbors = self.find_neighbors(new_node)
-                new_node = self.choose_parent(neighbors, nearest_node, new_node)
-                self.node_list.append(new_node)
-                self.rewire(new_node, neighbors)
-
-                if self.reached_goal(new_node):
-                    current_cost = new_node.cost
-                    if current_cost < best_cost:
-                        best_cost = current_cost
-                        self.path = self.generate_final_path(new_node)
-                        self.goal_reached = True
-                        no_improvement_count = 0
-                    else:
-                        no_improvement_count += 1
-
-                    if no_improvement_count >= self.max_no_improvement_iter:
-                        break
+def posiciones_por_cuadro(path, num_frames, velocidad=VELOCIDAD_ROBOT):
+    """
+    Posición (x, y) del robot en cada cuadro al avanzar `velocidad` por cuadro sobre `path`, como
+    arreglo de (num_frames, 2). Usa la tabla de longitud de arco acumulada del camino e interpola
+    todos los cuadros a la vez; después del final del camino el robot se queda en el último punto.
+    """
+    puntos = np.asarray(path, dtype=float)
+    longitud_acumulada = np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(puntos, axis=0).T))))
+    distancias = np.arange(num_frames) * velocidad
+    return np.column_stack([
+        np.interp(distancias, longitud_acumulada, puntos[:, 0]),
+        np.interp(distancias, longitud_acumulada, puntos[:, 1])
+    ])
 
-def ensure_output_directory():
-    """Crea el directorio de salida si no existe."""
-    os.makedirs('output', exist_ok=True)
 
-def visualize_space(initial_positions, target_positions, obstacles, paths=None):
+def exportar_gif(fig, ax, robots, posiciones, archivo, intervalo=20):
+    """
+    Guarda la animación como GIF dibujando el fondo estático una sola vez: en cada cuadro solo se
+    restaura el fondo y se dibujan los robots, en lugar de redibujar toda la figura.
+    """
+    for robot in robots:
+        robot.set_visible(False)
+    fig.canvas.draw()
+    fondo = fig.canvas.copy_from_bbox(fig.bbox)
+    for robot in robots:
+        robot.set_visible(True)
+
+    # El búfer está en píxeles físicos, que difieren de los lógicos en pantallas HiDPI
+    tamano = fig.canvas.get_width_height(physical=True)
+    cuadros = []
+    for frame in range(len(posiciones[0])):
+        fig.canvas.restore_region(fondo)
+        for robot, posiciones_robot in zip(robots, posiciones):
+            x, y = posiciones_robot[frame]
+            robot.set_xy((x - ANCHO_ROBOT/2, y - ALTO_ROBOT/2))
+            ax.draw_artist(robot)
+        cuadro = Image.frombuffer('RGBA', tamano, fig.canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
+        cuadros.append(cuadro.convert('RGB'))
+    cuadros[0].save(archivo, save_all=True, append_images=cuadros[1:], duration=intervalo, loop=0)
+
+
+def visualize_space(initial_positions, target_positions, obstacles, paths=None,
+                    archivo_animacion='output/simulation.gif', mostrar=True):
     """
     Visualiza el espacio con las posiciones iniciales, posiciones objetivo, obstáculos, caminos,
     y anima a los robots moviéndose a lo largo de sus caminos.
+
+    La animación se guarda en `archivo_animacion` (GIF, o MP4 si termina en .mp4 y hay ffmpeg; None
+    para no guardarla). Con mostrar=False no se abre la ventana, útil para exportar sin pantalla.
     """
     fig, ax = plt.subplots()
-    ax.set_xlim(-SPACE_WIDTH/2, SPACE_WIDTH/2)
-    ax.set_ylim(-SPACE_HEIGHT/2, SPACE_HEIGHT/2)
+    ax.set_xlim(-ANCHO_ESPACIO/2, ANCHO_ESPACIO/2)
+    ax.set_ylim(-ALTO_ESPACIO/2, ALTO_ESPACIO/2)
     ax.set_aspect('equal')
     
     # Dibujar puntos de la cuadrícula
-    for x in range(int(-SPACE_WIDTH), int(SPACE_WIDTH + 1)):
-        for y in range(int(-SPACE_HEIGHT), int(SPACE_HEIGHT + 1)):
-            ax.plot(x * 0.5, y * 0.5, 'ko', markersize=2)
+    malla_x, malla_y = np.meshgrid(np.arange(int(-ANCHO_ESPACIO), int(ANCHO_ESPACIO + 1)) * 0.5,
+                                   np.arange(int(-ALTO_ESPACIO), int(ALTO_ESPACIO + 1)) * 0.5)
+    ax.scatter(malla_x.ravel(), malla_y.ravel(), s=4, c='k')
     
     # Dibujar posiciones iniciales
     for pos in initial_positions:
@@ -348,82 +462,58 @@ def visualize_space(initial_positions, target_positions, obstacles, paths=None):
         for i, path in enumerate(paths):
             path_x, path_y = zip(*path)
             color = 'blue' if i == 0 else 'green'
-            ax.plot(path_x, path_y, color=color, linewidth=2, alpha=PATH_ALPHA, label=f'Camino Robot {i+1}')
+            ax.plot(path_x, path_y, color=color, linewidth=2, alpha=ALFA_RUTA, label=f'Camino Robot {i+1}')
         
         # Crear parches de robots
         robots = []
         robot_colors = ['blue', 'green']
         for i, pos in enumerate(initial_positions):
             robot = patches.Rectangle(
-                (pos[0] - ROBOT_WIDTH/2, pos[1] - ROBOT_HEIGHT/2),
-                ROBOT_WIDTH,
-                ROBOT_HEIGHT,
+                (pos[0] - ANCHO_ROBOT/2, pos[1] - ALTO_ROBOT/2),
+                ANCHO_ROBOT,
+                ALTO_ROBOT,
                 edgecolor='none',
                 facecolor=robot_colors[i]
             )
             ax.add_patch(robot)
             robots.append(robot)
         
-        # Calcular distancia total para cada camino
-        path_distances = []
-        for path in paths:
-            total_dist = 0
-            for i in range(len(path)-1):
-                dx = path[i+1][0] - path[i][0]
-                dy = path[i+1][1] - path[i][1]
-                total_dist += math.sqrt(dx*dx + dy*dy)
-            path_distances.append(total_dist)
-        
-        # Calcular número de cuadros necesarios
-        max_distance = max(path_distances)
-        num_frames = int(max_distance / ROBOT_SPEED) + 1
+        # Calcular número de cuadros necesarios según el camino más largo
+        max_distance = max(np.hypot(*np.diff(np.asarray(path, dtype=float), axis=0).T).sum() for path in paths)
+        num_frames = int(max_distance / VELOCIDAD_ROBOT) + 1
+        # Posiciones de todos los cuadros, calculadas una sola vez
+        posiciones = [posiciones_por_cuadro(path, num_frames) for path in paths]
         
         def update(frame):
-            # Calcular distancia recorrida
-            distance = frame * ROBOT_SPEED
-            
             # Actualizar posición de cada robot
-            for robot_idx, (robot, path) in enumerate(zip(robots, paths)):
-                # Encontrar posición a lo largo del camino en la distancia actual
-                current_dist = 0
-                current_pos = path[0]
-                
-                for i in range(len(path)-1):
-                    dx = path[i+1][0] - path[i][0]
-                    dy = path[i+1][1] - path[i][1]
-                    segment_dist = math.sqrt(dx*dx + dy*dy)
-                    
-                    if current_dist + segment_dist >= distance:
-                        # Interpolar posición
-                        t = (distance - current_dist) / segment_dist
-                        current_pos = (
-                            path[i][0] + t * dx,
-                            path[i][1] + t * dy
-                        )
-                        break
-                    current_dist += segment_dist
-                    if i == len(path)-2:  # Si está al final del camino
-                        current_pos = path[-1]
-                
-                # Actualizar posición del robot
-                robot.set_xy((current_pos[0] - ROBOT_WIDTH/2, current_pos[1] - ROBOT_HEIGHT/2))
-            
+            for robot, posiciones_robot in zip(robots, posiciones):
+                x, y = posiciones_robot[frame]
+                robot.set_xy((x - ANCHO_ROBOT/2, y - ALTO_ROBOT/2))
             return robots
         
         # Crear y guardar animación
-        ensure_output_directory()  # Agregar esta línea
         anim = FuncAnimation(
             fig, update, frames=num_frames,
             interval=20, blit=True
         )
-        anim.save('output/simulation.gif', writer='pillow')
+        if archivo_animacion:
+            directorio = os.path.dirname(archivo_animacion)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            if archivo_animacion.endswith('.mp4'):
+                anim.save(archivo_animacion, writer='ffmpeg')
+            else:
+                exportar_gif(fig, ax, robots, posiciones, archivo_animacion, intervalo=20)
     
     plt.legend()
     plt.gca().set_facecolor('white')
-    plt.show()
+    if mostrar:
+        plt.show()
+    else:
+        plt.close(fig)
 
 def write_trajectory_to_file(path, file_name, group, team, robot):
-    ensure_output_directory()  # Agregar esta línea
+    asegurar_directorio_salida()  # Agregar esta línea
     with open(file_name, 'w') as file:
         for i, (x, y) in enumerate(path):
             if i < 3:
@@ -454,11 +544,8 @@ def load_paths_from_directory(directory):
         paths.append(path)
     return paths
 
-def generate_paths():
-    initial_positions = parse_initial_positions('input/InitialPositions.txt')
-    target_positions = parse_target_positions('input/TargetPositions.txt')
-    obstacles = parse_obstacles('input')
-    
+def segmentos_robots(initial_positions, target_positions):
+    """Lista de (robot, segmento, inicio, fin) con cada par de puntos consecutivos del recorrido de cada robot."""
     # Definir el orden para cada robot
     robot_1_order = [1, 2, 4, 5, 3, 7, 6]
     robot_2_order = [7, 3, 6, 1, 2, 4, 5]
@@ -467,40 +554,96 @@ def generate_paths():
     robot_1_targets = [target_positions[i - 1] for i in robot_1_order]
     robot_2_targets = [target_positions[i - 1] for i in robot_2_order]
     
-    paths = []
+    segmentos = []
     for i, (initial_position, targets) in enumerate(zip(initial_positions, [robot_1_targets, robot_2_targets])):
-        path = []
-        current_position = initial_position
-        robot_number = i + 1
-        all_positions = [current_position] + targets
+        all_positions = [initial_position] + targets
         for j in range(len(targets)):
-            start_point = all_positions[j]
-            end_point = all_positions[j + 1]
-            print(f"Calculando desde el punto {j} al punto {j+1} para el Robot {robot_number}...")
-            start_time = time.time()
-            rrt_star = RRTStar(
-                start=start_point,
-                goal=end_point,
-                obstacles=obstacles,
-                map_size=(SPACE_WIDTH, SPACE_HEIGHT),
-                step_size=0.5,
-                max_iter=30000,
-                goal_bias=0.2,
-                improvement_threshold=0.01,
-                max_no_improvement_iter=1000
-            )
-            rrt_star.plan()
-            end_time = time.time()
-            if rrt_star.path:
-                segment_path = rrt_star.path
-                if j > 0:
-                    # Evitar puntos duplicados entre segmentos
-                    segment_path = segment_path[1:]
-                path.extend(segment_path)
-                print(f"Camino obtenido en {end_time - start_time:.2f} segundos.")
-            else:
+            segmentos.append((i + 1, j, all_positions[j], all_positions[j + 1]))
+    return segmentos
+
+
+def semilla_segmento(semilla, robot_number, segmento):
+    """Semilla determinista de un segmento, independiente del orden en que se ejecuten."""
+    return semilla * 10000 + robot_number * 100 + segmento
+
+
+def planificar_segmento(tarea):
+    """Planea un segmento en un proceso del pool; regresa (robot, segmento, ruta, segundos)."""
+    robot_number, segmento, start_point, end_point, obstacles, semilla, presupuesto_ms = tarea
+    random.seed(semilla)
+    start_time = time.time()
+    rrt_star = RRTStar(
+        inicio=start_point,
+        objetivo=end_point,
+        obstaculos=obstacles,
+        tamano_mapa=(ANCHO_ESPACIO, ALTO_ESPACIO),
+        tamano_paso=0.5,
+        max_iter=30000,
+        objetivo_bias=0.2,
+        umbral_mejora=0.01,
+        max_iter_sin_mejora=1000
+    )
+    rrt_star.planificar(presupuesto_ms)
+    return robot_number, segmento, rrt_star.ruta, time.time() - start_time
+
+
+def planificar_segmentos_prm(tareas, semilla):
+    """Resuelve todos los segmentos con un mapa de rutas compartido, construido o cargado de disco una sola vez."""
+    verificador = crear_verificador(tareas[0][4], (ANCHO_ESPACIO, ALTO_ESPACIO))
+    start_time = time.time()
+    mapa = MapaRutas.cargar_o_construir(verificador, limites_mapa((ANCHO_ESPACIO, ALTO_ESPACIO)), semilla=semilla)
+    print(f"Mapa de rutas de {len(mapa)} nodos listo en {time.time() - start_time:.2f} segundos.")
+    resultados = []
+    for robot_number, segmento, start_point, end_point, _, _, _ in tareas:
+        start_time = time.time()
+        resultados.append((robot_number, segmento, mapa.consultar(start_point, end_point), time.time() - start_time))
+    return resultados
+
+
+def generate_paths(procesos=None, semilla=0, presupuesto_ms=None, planificador='rrt'):
+    """
+    Planea todos los segmentos de ambos robots en paralelo en un pool de procesos (procesos=1 los
+    planea en serie) y une los segmentos de cada robot en un solo camino. Cada segmento usa su
+    propia semilla, por lo que el resultado no depende del número de procesos.
+    Con `presupuesto_ms` cada segmento se detiene al agotar ese tiempo; en ese caso el resultado
+    depende también de la velocidad de la máquina.
+    Con planificador='prm' los segmentos se consultan en un mapa de rutas guardado en disco por
+    conjunto de obstáculos, en lugar de construir un árbol de RRT* por segmento.
+    """
+    initial_positions = parse_initial_positions('input/InitialPositions.txt')
+    target_positions = parse_target_positions('input/TargetPositions.txt')
+    obstacles = parse_obstacles('input')
+    
+    tareas = [
+        (robot_number, j, start_point, end_point, obstacles, semilla_segmento(semilla, robot_number, j), presupuesto_ms)
+        for robot_number, j, start_point, end_point in segmentos_robots(initial_positions, target_positions)
+    ]
+
+    print(f"Calculando {len(tareas)} segmentos...")
+    start_time = time.time()
+    if planificador == 'prm':
+        resultados = planificar_segmentos_prm(tareas, semilla)
+    elif procesos == 1:
+        resultados = [planificar_segmento(tarea) for tarea in tareas]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = list(pool.map(planificar_segmento, tareas))
+    print(f"Segmentos calculados en {time.time() - start_time:.2f} segundos.")
+    segmentos = {(robot_number, j): (ruta, duracion) for robot_number, j, ruta, duracion in resultados}
+
+    paths = []
+    for robot_number in range(1, len(initial_positions) + 1):
+        path = []
+        j = 0
+        while (robot_number, j) in segmentos:
+            segment_path, duracion = segmentos[(robot_number, j)]
+            if not segment_path:
                 print(f"No se encontró camino desde el punto {j} al punto {j+1} para el Robot {robot_number}.")
                 break
+            print(f"Robot {robot_number}, punto {j} al punto {j+1}: camino obtenido en {duracion:.2f} segundos.")
+            # Evitar puntos duplicados entre segmentos
+            path.extend(segment_path if j == 0 else segment_path[1:])
+            j += 1
         if path:
             paths.append(path)
             write_trajectory_to_file(
@@ -0,0 +1,165 @@
+"""
+Mapa de rutas (PRM) reutilizable para consultas de múltiples segmentos
+
+TC2008B
+Grupo: 303
+Equipo: 1
+"""
+
+import heapq
+import math
+
+import numpy as np
+
+import cache_disco
+from indice_espacial import IndiceEspacial
+
+# Cambiar al modificar el formato o la forma de construir el mapa, para invalidar los archivos guardados
+VERSION_MAPA = 2
+DIRECTORIO_MAPAS = 'mapas_rutas'
+
+
+def clave_mapa(verificador, limites, num_nodos, radio_conexion, semilla):
+    """Hash de los obstáculos, el robot y los parámetros de construcción del mapa."""
+    return cache_disco.clave(
+        (VERSION_MAPA, limites, verificador.ancho_robot, verificador.alto_robot, num_nodos, radio_conexion, semilla),
+        verificador.poligonos)
+
+
+class MapaRutas:
+    """
+    Roadmap probabilístico (PRM) de la arena, construido una vez por conjunto de obstáculos.
+
+    Los nodos son puntos aleatorios fuera de los obstáculos y cada par a lo más `radio_conexion` se
+    une si el robot puede recorrer la arista sin colisión. El grafo se guarda como listas de
+    adyacencia comprimidas (`inicio_vecinos`, `vecinos`, `pesos`), de modo que cargarlo de disco y
+    consultarlo no requiere volver a probar geometría salvo para conectar el inicio y el objetivo.
+    """
+
+    def __init__(self, verificador, nodos, inicio_vecinos, vecinos, pesos, radio_conexion):
+        self.verificador = verificador
+        self.nodos = nodos
+        self.inicio_vecinos = inicio_vecinos
+        self.vecinos = vecinos
+        self.pesos = pesos
+        self.radio_conexion = radio_conexion
+        self.indice = IndiceEspacial(radio_conexion)
+        for i, (x, y) in enumerate(self.nodos.tolist()):
+            self.indice.insertar(x, y, i)
+
+    def __len__(self):
+        return len(self.nodos)
+
+    @classmethod
+    def construir(cls, verificador, limites, num_nodos=3000, radio_conexion=0.4, semilla=0):
+        x_min, y_min, x_max, y_max = limites
+        generador = np.random.default_rng(semilla)
+        nodos = []
+        while len(nodos) < num_nodos:
+            x, y = generador.uniform(x_min, x_max), generador.uniform(y_min, y_max)
+            # Basta con que el centro esté libre; las aristas prueban al robot completo en su orientación
+            if not verificador.centro_en_obstaculo(x, y):
+                nodos.append((x, y))
+        nodos = np.array(nodos)
+
+        indice = IndiceEspacial(radio_conexion)
+        for i, (x, y) in enumerate(nodos.tolist()):
+            indice.insertar(x, y, i)
+        aristas = [[] for _ in range(num_nodos)]
+        for i, (x, y) in enumerate(nodos.tolist()):
+            # Cada par se prueba una sola vez, desde el nodo de menor índice
+            cercanos = np.array([j for j in indice.en_radio(x, y, radio_conexion) if j > i], dtype=np.int64)
+            if len(cercanos) == 0:
+                continue
+            libres = verificador.aristas_libres(x, y, nodos[cercanos, 0], nodos[cercanos, 1])
+            for j in cercanos[libres].tolist():
+                peso = math.hypot(nodos[j, 0] - x, nodos[j, 1] - y)
+                aristas[i].append((j, peso))
+                aristas[j].append((i, peso))
+
+        inicio_vecinos = np.zeros(num_nodos + 1, dtype=np.int64)
+        inicio_vecinos[1:] = np.cumsum([len(a) for a in aristas])
+        vecinos = np.array([j for a in aristas for j, _ in a], dtype=np.int64)
+        pesos = np.array([peso for a in aristas for _, peso in a], dtype=float)
+        return cls(verificador, nodos, inicio_vecinos, vecinos, pesos, radio_conexion)
+
+    @classmethod
+    def cargar_o_construir(cls, verificador, limites, num_nodos=3000, radio_conexion=0.4, semilla=0,
+                           directorio=DIRECTORIO_MAPAS):
+        """Carga el mapa de estos obstáculos desde disco o lo construye y lo guarda."""
+        def construir():
+            mapa = cls.construir(verificador, limites, num_nodos, radio_conexion, semilla)
+            return {'nodos': mapa.nodos, 'inicio_vecinos': mapa.inicio_vecinos, 'vecinos': mapa.vecinos,
+                    'pesos': mapa.pesos}
+
+        clave = clave_mapa(verificador, limites, num_nodos, radio_conexion, semilla)
+        arreglos = cache_disco.cargar_o_construir(directorio, clave, construir)
+        return cls(verificador, radio_conexion=radio_conexion, **arreglos)
+
+    def _conectar(self, punto):
+        """Nodos del mapa alcanzables en línea recta desde `punto`, con su distancia; amplía el radio si no hay."""
+        radio = self.radio_conexion
+        while radio <= 4 * self.radio_conexion:
+            cercanos = np.array(self.indice.en_radio(punto[0], punto[1], radio), dtype=np.int64)
+            if len(cercanos) > 0:
+                libres = self.verificador.aristas_libres(punto[0], punto[1], self.nodos[cercanos, 0], self.nodos[cercanos, 1])
+                cercanos = cercanos[libres]
+                if len(cercanos) > 0:
+                    distancias = np.hypot(self.nodos[cercanos, 0] - punto[0], self.nodos[cercanos, 1] - punto[1])
+                    return list(zip(cercanos.tolist(), distancias.tolist()))
+            radio *= 2
+        return []
+
+    def consultar(self, inicio, objetivo, suavizar=True):
+        """
+        Ruta más corta en el mapa de `inicio` a `objetivo` (A* con distancia euclidiana), como lista de
+        tuplas (x, y) que empieza y termina exactamente en esos puntos; None si no están conectados.
+        """
+        inicio, objetivo = tuple(inicio), tuple(objetivo)
+        if self.verificador.arista_libre(inicio[0], inicio[1], objetivo[0], objetivo[1]):
+            return [inicio, objetivo]
+        salidas = self._conectar(inicio)
+        llegadas = dict(self._conectar(objetivo))
+        if not salidas or not llegadas:
+            return None
+
+        # -1 representa al inicio; la llegada al objetivo se evalúa al expandir cada nodo conectado a él
+        def heuristica(i):
+            return math.hypot(objetivo[0] - self.nodos[i, 0], objetivo[1] - self.nodos[i, 1])
+
+        costos = {}
+        padres = {}
+        abiertos = []
+        for j, peso in salidas:
+            costos[j] = peso
+            padres[j] = -1
+            heapq.heappush(abiertos, (peso + heuristica(j), peso, j))
+        mejor_llegada = (math.inf, None)
+        cerrados = set()
+        while abiertos:
+            estimado, costo, i = heapq.heappop(abiertos)
+            if estimado >= mejor_llegada[0]:
+                break
+            if i in cerrados:
+                continue
+            cerrados.add(i)
+            if i in llegadas and costo + llegadas[i] < mejor_llegada[0]:
+                mejor_llegada = (costo + llegadas[i], i)
+            for k in range(self.inicio_vecinos[i], self.inicio_vecinos[i + 1]):
+                j = int(self.vecinos[k])
+                nuevo_costo = costo + self.pesos[k]
+                if j not in cerrados and nuevo_costo < costos.get(j, math.inf):
+                    costos[j] = nuevo_costo
+                    padres[j] = i
+                    heapq.heappush(abiertos, (nuevo_costo + heuristica(j), nuevo_costo, j))
+        if mejor_llegada[1] is None:
+            return None
+
+        ruta = [objetivo]
+        i = mejor_llegada[1]
+        while i != -1:
+            ruta.append((float(self.nodos[i, 0]), float(self.nodos[i, 1])))
+            i = padres[i]
+        ruta.append(inicio)
+        ruta.reverse()
+        return self.verificador.suavizar_ruta(ruta) if suavizar else ruta